@@ -1,15 +1,101 @@
 from django.contrib import admin
+from django.forms.models import BaseInlineFormSet
+from django.urls import reverse
+from django.utils.html import format_html
 
-from .models import Comment, News
+from .models import BadWord, Comment, News
+from .moderation import delete_comments, set_status
+
+# Столько последних комментариев показывает страница новости;
+# остальные — в списке комментариев с фильтром по новости.
+INLINE_COMMENTS = 20
+
+
+class LatestCommentsFormSet(BaseInlineFormSet):
+    """Только последние INLINE_COMMENTS комментариев новости."""
+
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            self._queryset = self.queryset.select_related(
+                'author'
+            ).order_by('-created', '-pk')[:INLINE_COMMENTS]
+        return self._queryset
 
 
 class CommentInline(admin.StackedInline):
     model = Comment
+    formset = LatestCommentsFormSet
     extra = 0
+    fields = ('author', 'created', 'text', 'status')
+    readonly_fields = ('author', 'created')
+    show_change_link = True
+
+    def has_add_permission(self, request, obj=None):
+        # Комментарии пишут читатели, а не редакторы.
+        return False
 
 
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
+    list_display = ('title', 'date', 'comment_count')
+    readonly_fields = ('all_comments',)
     inlines = [
         CommentInline,
     ]
+
+    @admin.display(description='Комментарии')
+    def all_comments(self, news):
+        url = reverse('admin:news_comment_changelist')
+        return format_html(
+            '<a href="{}?news__id__exact={}">Все комментарии: {}</a>',
+            url, news.pk, news.comment_count
+        )
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    """
+    Комментарии с фильтрами по новости, дате и статусу.
+
+    Фильтр по новости — параметр news__id__exact из ссылки на странице
+    новости: выпадающий список всех новостей был бы слишком длинным.
+    Обе выборки идут по индексам (news, created, id) и (created, id).
+    У отклонённых модерацией видно, какие слова она нашла.
+    """
+    list_display = (
+        '__str__', 'news', 'author', 'created', 'status', 'flagged_words'
+    )
+    list_select_related = ('news', 'author')
+    readonly_fields = ('flagged_words',)
+    list_filter = ('status', 'created')
+    raw_id_fields = ('news', 'author')
+    ordering = ('-created', '-pk')
+    # Полный COUNT(*) по всей таблице на каждой странице не нужен.
+    show_full_result_count = False
+    actions = ('publish', 'reject', 'delete_chunked')
+
+    def get_actions(self, request):
+        # Стандартное удаление загружает и удаляет объекты по одному.
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(description='Опубликовать', permissions=('change',))
+    def publish(self, request, queryset):
+        changed = set_status(queryset, Comment.Status.PUBLISHED)
+        self.message_user(request, f'Опубликовано комментариев: {changed}')
+
+    @admin.action(description='Отклонить', permissions=('change',))
+    def reject(self, request, queryset):
+        changed = set_status(queryset, Comment.Status.REJECTED)
+        self.message_user(request, f'Отклонено комментариев: {changed}')
+
+    @admin.action(description='Удалить', permissions=('delete',))
+    def delete_chunked(self, request, queryset):
+        deleted = delete_comments(queryset)
+        self.message_user(request, f'Удалено комментариев: {deleted}')
+
+
+@admin.register(BadWord)
+class BadWordAdmin(admin.ModelAdmin):
+    search_fields = ('word',)
@@ -0,0 +1,156 @@
+"""
+JSON API только для чтения: новости и ветки комментариев.
+
+Строки сериализуются прямо из values(), без объектов моделей.
+Параметр fields выбирает поля ответа, after — курсор страницы,
+как у ветки комментариев на сайте. ETag — версия данных из кэша,
+как у HTML-страниц. Готовый JSON страницы хранится в кэше под той же
+версией, как HTML ветки комментариев: пользователь в ответ не входит.
+"""
+import hashlib
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views import generic
+
+from .cache import (
+    NEWS_LIST_VERSION_KEY, cached_fragment, get_version, news_version_key,
+    page_validators
+)
+from .models import Comment, News
+from .pagination import keyset_page
+from .replicas import use_primary
+
+
+def bad_request(message):
+    return JsonResponse({'error': message}, status=400)
+
+
+class ValuesListApi(generic.View):
+    """
+    Страница строк queryset в виде JSON.
+
+    fields — имя поля в ответе → путь к полю для values(); в ответ
+    по умолчанию идут default_fields. Поля ordering читаются всегда:
+    по ним строится курсор следующей страницы.
+    """
+    fields = {}
+    default_fields = ()
+    ordering = ()
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get_version_key(self):
+        raise NotImplementedError
+
+    def get_fields(self):
+        requested = self.request.GET.get('fields')
+        if not requested:
+            return self.default_fields
+        fields = tuple(dict.fromkeys(requested.split(',')))
+        unknown = set(fields) - self.fields.keys()
+        if unknown:
+            raise ValueError(
+                f'Неизвестные поля: {", ".join(sorted(unknown))}.'
+            )
+        return fields
+
+    def get_page(self, queryset):
+        return keyset_page(
+            queryset, self.ordering, self.request.GET.get('after'),
+            settings.NEWS_API_PAGE_SIZE,
+        )
+
+    def get(self, request, *args, **kwargs):
+        try:
+            fields = self.get_fields()
+        except ValueError as error:
+            return bad_request(str(error))
+        lookups = [self.fields[name] for name in fields]
+        columns = dict.fromkeys([
+            *(field.lstrip('-') for field in self.ordering), *lookups
+        ])
+
+        def render():
+            # Отстающая реплика сохранила бы под новой версией старые строки.
+            with use_primary():
+                rows, next_cursor = self.get_page(
+                    self.get_queryset().values(*columns)
+                )
+            next_url = None
+            if next_cursor:
+                params = request.GET.copy()
+                params['after'] = next_cursor
+                next_url = f'{request.path}?{params.urlencode()}'
+            return JsonResponse(
+                {
+                    'results': [
+                        {
+                            name: row[lookup]
+                            for name, lookup in zip(fields, lookups)
+                        }
+                        for row in rows
+                    ],
+                    'next': next_url,
+                },
+                json_dumps_params={'ensure_ascii': False},
+            ).content
+
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        content = cached_fragment(
+            f'news:api:{get_version(self.get_version_key())}:{path}',
+            render, settings.NEWS_API_CACHE_TIMEOUT
+        )
+        return HttpResponse(content, content_type='application/json')
+
+
+@page_validators(lambda: NEWS_LIST_VERSION_KEY)
+class NewsListApi(ValuesListApi):
+    """Новости от свежих к старым."""
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'date': 'date',
+        'excerpt': 'excerpt',
+        'text': 'text',
+        'comment_count': 'comment_count',
+    }
+    default_fields = ('id', 'title', 'date', 'excerpt', 'comment_count')
+    ordering = ('-date', '-id')
+
+    def get_queryset(self):
+        return News.objects.all()
+
+    def get_version_key(self):
+        return NEWS_LIST_VERSION_KEY
+
+
+@page_validators(lambda pk: news_version_key(pk))
+class CommentsListApi(ValuesListApi):
+    """Опубликованные комментарии новости в порядке публикации."""
+    fields = {
+        'id': 'id',
+        'text': 'text',
+        'created': 'created',
+        'author': 'author__username',
+    }
+    default_fields = ('id', 'author', 'text', 'created')
+    ordering = ('created', 'id')
+
+    def get_queryset(self):
+        return Comment.objects.filter(
+            news_id=self.kwargs['pk'], status=Comment.Status.PUBLISHED
+        )
+
+    def get_version_key(self):
+        return news_version_key(self.kwargs['pk'])
+
+    def get_page(self, queryset):
+        rows, next_cursor = super().get_page(queryset)
+        # Есть ли новость, проверяется, только когда комментариев нет.
+        if not rows and not News.objects.filter(
+            pk=self.kwargs['pk']
+        ).exists():
+            raise Http404('Новость не найдена.')
+        return rows, next_cursor
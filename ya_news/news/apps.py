@@ -5,3 +5,11 @@ class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'news'
     verbose_name = 'Новости'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        from . import auth, signals  # noqa: F401
+        from .search import ensure_triggers
+
+        post_migrate.connect(ensure_triggers, sender=self)
@@ -0,0 +1,180 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from .replicas import reads_from_replica, use_primary
+
+HOME_VERSION_KEY = 'news:home:version'
+HOME_IDS_KEY = 'news:home:ids'
+# Версия всего списка новостей, а не только главной: его страницы
+# в API показывают и новости, которых на главной нет.
+NEWS_LIST_VERSION_KEY = 'news:list:version'
+RENDER_LOCK_TIMEOUT = 10
+RENDER_WAIT_TIMEOUT = 2
+RENDER_WAIT_STEP = 0.02
+
+
+def news_version_key(news_id):
+    return f'news:{news_id}:version'
+
+
+def get_version(key):
+    """
+    Текущая версия ключа.
+
+    Версия — метка времени в наносекундах: если кэш потеряет её,
+    новая версия не совпадёт ни с одной из прежних.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    cache.set(key, time.time_ns(), None)
+
+
+def remember_home_page(news_ids):
+    """Запоминает, какие новости сейчас выведены на главной."""
+    cache.set(HOME_IDS_KEY, list(news_ids), None)
+
+
+def bump_home():
+    bump_version(HOME_VERSION_KEY)
+    bump_version(NEWS_LIST_VERSION_KEY)
+
+
+def bump_news(news_id):
+    """
+    Сбрасывает страницы, на которых видна новость.
+
+    Главная страница сбрасывается, только если новость на ней выведена
+    или неизвестно, какие новости там сейчас.
+    """
+    bump_version(news_version_key(news_id))
+    home_ids = cache.get(HOME_IDS_KEY)
+    if home_ids is None or news_id in home_ids:
+        bump_home()
+    else:
+        bump_version(NEWS_LIST_VERSION_KEY)
+
+
+def comments_fragment_key(news_id, cursor):
+    """Ключ страницы ветки: меняется с версией новости."""
+    cursor = hashlib.md5((cursor or '').encode()).hexdigest()
+    return f'news:comments:{get_version(news_version_key(news_id))}:{cursor}'
+
+
+def cached_fragment(key, render, timeout):
+    """HTML-фрагмент из кэша или, если его там нет, свежий рендер."""
+    if not timeout:
+        return render()
+    html = cache.get(key)
+    if html is None:
+        html = render()
+        cache.set(key, html, timeout)
+    return html
+
+
+def is_cacheable(request):
+    """Кэшируется ли ответ на запрос целиком."""
+    return bool(
+        settings.NEWS_PAGE_CACHE_TIMEOUT
+        and request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+    )
+
+
+def page_validators(get_version_key):
+    """
+    Условный GET по версии страницы.
+
+    ETag вычисляется из версии в кэше до рендера и без запросов к базе,
+    поэтому ответ 304 почти ничего не стоит. Пользователи видят страницу
+    по-разному, поэтому в ETag входит и он. Last-Modified не отдаётся:
+    он точен до секунды, и после изменения в ту же секунду клиент
+    с одним If-Modified-Since получил бы 304 на устаревшую страницу.
+    Страница, прочитанная с реплики, может отставать от версии, поэтому
+    такие ответы идут без валидаторов.
+    """
+
+    def is_fresh(request):
+        return is_cacheable(request) or not reads_from_replica()
+
+    def etag(request, *args, **kwargs):
+        if not is_fresh(request):
+            return None
+        version = get_version(get_version_key(**kwargs))
+        return f'{version}-{request.user.pk or 0}'
+
+    return method_decorator(condition(etag_func=etag), name='dispatch')
+
+
+def get_or_render(key, render, timeout):
+    """
+    Берёт ответ из кэша или рендерит его под блокировкой.
+
+    Пока один запрос рендерит страницу, остальные ждут готовый ответ,
+    а не рендерят её одновременно.
+    """
+    response = cache.get(key)
+    if response is not None:
+        return response
+    lock_key = f'{key}:lock'
+    locked = cache.add(lock_key, 1, RENDER_LOCK_TIMEOUT)
+    if not locked:
+        deadline = time.monotonic() + RENDER_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(RENDER_WAIT_STEP)
+            response = cache.get(key)
+            if response is not None:
+                return response
+    try:
+        response = render()
+        if response.status_code == 200:
+            cache.set(key, response, timeout)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return response
+
+
+class AnonymousPageCacheMixin:
+    """
+    Кэширует ответы на анонимные GET-запросы.
+
+    В ключ входит версия страницы, поэтому изменение данных
+    сбрасывает только затронутые страницы. Страница для кэша читается
+    из основной базы: отстающая реплика сохранила бы под новой версией
+    старые данные.
+    """
+
+    def get_page_version(self):
+        raise NotImplementedError
+
+    def dispatch(self, request, *args, **kwargs):
+        if not is_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        key = f'news:page:{self.get_page_version()}:{path}'
+
+        def render():
+            with use_primary():
+                response = super(AnonymousPageCacheMixin, self).dispatch(
+                    request, *args, **kwargs
+                )
+                if hasattr(response, 'render'):
+                    start = time.perf_counter()
+                    response.render()
+                    # Рендер здесь, внутри view: учесть его в Server-Timing.
+                    if hasattr(request, 'template_time'):
+                        request.template_time += time.perf_counter() - start
+            return response
+
+        return get_or_render(key, render, settings.NEWS_PAGE_CACHE_TIMEOUT)
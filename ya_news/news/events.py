@@ -0,0 +1,259 @@
+"""
+Новые комментарии в реальном времени через Server-Sent Events.
+
+Читатель новости открывает адрес news:events и получает каждый
+опубликованный комментарий без перезагрузки страницы. Соединения
+обслуживает ASGI-приложение CommentEvents перед Django: потоковый
+ответ Django 3.2 занял бы по потоку на каждого читателя.
+
+Комментарий публикуется после фиксации транзакции: событие
+сериализуется один раз и раздаётся всем подписчикам новости через
+брокер из NEWS_EVENTS_BROKER, без запросов к базе на каждого.
+LocalBroker работает внутри процесса; при нескольких процессах
+его заменяет брокер с тем же интерфейсом поверх общей шины.
+У каждого подписчика очередь на NEWS_EVENTS_QUEUE_SIZE событий:
+кто не успевает их забирать, отключается, а EventSource браузера
+переподключится сам.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from django.utils.module_loading import import_string
+
+from .models import News
+
+EVENTS_URL_NAME = 'news:events'
+# Через сколько миллисекунд EventSource переподключается после обрыва.
+RECONNECT_MS = 3000
+# Комментарий SSE: не даёт прокси закрыть тихое соединение.
+PING = b': ping\n\n'
+# Идущие проверки существования новостей: (цикл событий, id) -> задача.
+NEWS_CHECKS = {}
+
+
+class Subscription:
+    """
+    Очередь событий одного подписчика в его цикле событий.
+
+    Пинг кладётся в очередь таймером цикла, а не ожиданием
+    с таймаутом: wait_for на каждое событие впятеро замедляет
+    рассылку.
+    """
+
+    def __init__(self, broker, key, size):
+        self.broker = broker
+        self.key = key
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(size)
+        self.dropped = False
+        self.timer = self.loop.call_later(
+            settings.NEWS_EVENTS_KEEPALIVE, self.ping
+        )
+
+    def ping(self):
+        if self.queue.empty():
+            self.queue.put_nowait(PING)
+        self.timer = self.loop.call_later(
+            settings.NEWS_EVENTS_KEEPALIVE, self.ping
+        )
+
+    def deliver(self, event):
+        """Кладёт событие в очередь; вызывается в цикле подписчика."""
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.close()
+
+    def close(self):
+        """Отписывает и будит читателя: он получит None."""
+        if self.dropped:
+            return
+        self.dropped = True
+        self.timer.cancel()
+        self.broker.unsubscribe(self)
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class LocalBroker:
+    """
+    Подписки внутри процесса.
+
+    publish вызывается из любого потока; подписчики одного цикла
+    событий получают событие одним вызовом call_soon_threadsafe.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+
+    def subscribe(self, key):
+        subscription = Subscription(
+            self, key, settings.NEWS_EVENTS_QUEUE_SIZE
+        )
+        with self.lock:
+            self.subscriptions[key].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscriptions.get(subscription.key)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self.subscriptions[subscription.key]
+
+    def publish(self, key, event):
+        with self.lock:
+            subscribers = list(self.subscriptions.get(key, ()))
+        by_loop = defaultdict(list)
+        for subscription in subscribers:
+            by_loop[subscription.loop].append(subscription)
+        for loop, group in by_loop.items():
+            loop.call_soon_threadsafe(fan_out, group, event)
+
+
+def fan_out(subscriptions, event):
+    for subscription in subscriptions:
+        subscription.deliver(event)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.NEWS_EVENTS_BROKER)()
+
+
+def comment_event(comment):
+    """Событие SSE о комментарии из словаря с id, author, text и created."""
+    data = json.dumps({
+        **comment, 'created': comment['created'].isoformat()
+    }, ensure_ascii=False)
+    return f'id: {comment["id"]}\nevent: comment\ndata: {data}\n\n'.encode()
+
+
+def publish_comment(news_id, comment):
+    get_broker().publish(news_id, comment_event(comment))
+
+
+async def stream(news_id, receive, send):
+    """Держит соединение и пишет в него события новости news_id."""
+    subscription = get_broker().subscribe(news_id)
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        subscription.close()
+
+    watcher = asyncio.ensure_future(watch_disconnect())
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                # Прокси не должен копить события в буфере.
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': f'retry: {RECONNECT_MS}\n\n'.encode(),
+            'more_body': True,
+        })
+        while True:
+            event = await subscription.get()
+            if event is None:
+                break
+            await send({
+                'type': 'http.response.body', 'body': event,
+                'more_body': True,
+            })
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        subscription.close()
+        watcher.cancel()
+
+
+async def news_exists(news_id):
+    """
+    Есть ли новость news_id.
+
+    Одновременные подключения к одной новости ждут общего запроса
+    к базе: иначе каждое встало бы в очередь единственного потока
+    sync_to_async, и 10 000 читателей подключались бы секундами.
+    """
+    key = asyncio.get_running_loop(), news_id
+    check = NEWS_CHECKS.get(key)
+    if check is None:
+        check = NEWS_CHECKS[key] = asyncio.ensure_future(
+            sync_to_async(News.objects.filter(pk=news_id).exists)()
+        )
+        check.add_done_callback(lambda _: NEWS_CHECKS.pop(key, None))
+    return await asyncio.shield(check)
+
+
+async def not_found(send):
+    await send({
+        'type': 'http.response.start',
+        'status': 404,
+        'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+    })
+    await send({
+        'type': 'http.response.body', 'body': 'Новость не найдена.'.encode()
+    })
+
+
+def events_news_id(scope):
+    """
+    Номер новости, если запрос — поток news:events, иначе None.
+
+    Адрес разбирается URL-конфигурацией Django, как у ASGIRequest:
+    без root_path в начале пути.
+    """
+    if scope['type'] != 'http':
+        return None
+    path = scope['path']
+    root_path = scope.get('root_path', '')
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return None
+    if match.view_name != EVENTS_URL_NAME:
+        return None
+    return match.kwargs['pk']
+
+
+class CommentEvents:
+    """
+    ASGI-приложение: news:events — сюда, остальное — в Django.
+
+    Поток открывается только для существующей новости: иначе 404,
+    а не соединение, которое никогда ничего не получит.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        news_id = events_news_id(scope)
+        if news_id is None:
+            return await self.application(scope, receive, send)
+        if not await news_exists(news_id):
+            return await not_found(send)
+        await stream(news_id, receive, send)
@@ -1,7 +1,9 @@
-from django.forms import ModelForm
+from django.conf import settings
+from django.forms import CharField, DateField, Form, ModelForm
 from django.core.exceptions import ValidationError
 
 from .models import Comment
+from .profanity import ProfanityFilter
 
 BAD_WORDS = (
     'редиска',
@@ -10,6 +12,13 @@ BAD_WORDS = (
 )
 WARNING = 'Не ругайтесь!'
 
+profanity_filter = ProfanityFilter(BAD_WORDS)
+
+
+def flagged_words(matches):
+    """Найденные слова через запятую, без повторов, в порядке текста."""
+    return ', '.join(dict.fromkeys(match.word for match in matches))
+
 
 class CommentForm(ModelForm):
 
@@ -18,10 +27,30 @@ class CommentForm(ModelForm):
         fields = ('text',)
 
     def clean_text(self):
-        """Не позволяем ругаться в комментариях."""
+        """
+        Не позволяем ругаться в комментариях.
+
+        Найденные слова с позициями остаются в bad_words для модераторов.
+        При COMMENT_MODERATION_ASYNC текст проверяет не запрос,
+        а moderate_comments.
+        """
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if settings.COMMENT_MODERATION_ASYNC:
+            return text
+        self.bad_words = profanity_filter.find_all(text)
+        if self.bad_words:
+            raise ValidationError(WARNING)
         return text
+
+    def save(self, commit=True):
+        """Новый и исправленный текст ждут модерации, если она отложена."""
+        if settings.COMMENT_MODERATION_ASYNC:
+            self.instance.status = Comment.Status.PENDING
+            self.instance.flagged_words = ''
+        return super().save(commit)
+
+
+class NewsSearchForm(Form):
+    q = CharField(label='Слова', required=False, max_length=200)
+    date_from = DateField(label='С даты', required=False)
+    date_to = DateField(label='По дату', required=False)
@@ -0,0 +1,121 @@
+import codecs
+import json
+import re
+from datetime import date
+
+from django.db import transaction
+
+from .cache import bump_home
+from .models import News, make_content_hash, make_excerpt
+
+CHUNK_SIZE = 1 << 16
+SEPARATORS = re.compile(r'[ \t\r\n,]*')
+# Сколько отпечатков проверять одним запросом: лимит параметров SQLite.
+HASH_LOOKUP_SIZE = 900
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(file):
+    """JSON-массив начинается с «[», JSON Lines — сразу с объекта."""
+    file.seek(0)
+    head = file.read(CHUNK_SIZE).lstrip(codecs.BOM_UTF8).lstrip()
+    file.seek(0)
+    return 'json' if head.startswith(b'[') else 'jsonl'
+
+
+def read_json_lines(file, offset=0):
+    """Отдаёт записи JSON Lines и байтовое смещение после каждой из них."""
+    file.seek(offset)
+    for line in file:
+        offset += len(line)
+        if line.strip():
+            yield json.loads(line), offset
+
+
+def read_json_array(file, offset=0):
+    """
+    Потоково разбирает JSON-массив объектов.
+
+    Файл читается кусками, в памяти держится только текущий кусок.
+    Вместе с записью отдаётся байтовое смещение после неё: с этого места
+    можно продолжить разбор, передав его в offset.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    opened = bool(offset)
+    if not opened and file.read(3) == codecs.BOM_UTF8:
+        offset = 3
+    file.seek(offset)
+    # Разбор идёт по позиции в буфере; разобранное начало отрезается
+    # только при дочитывании куска, а не после каждой записи.
+    buffer, position, eof = '', 0, False
+    while True:
+        start = SEPARATORS.match(buffer, position).end()
+        if not opened and buffer[start:start + 1] == '[':
+            offset += len(buffer[position:start + 1].encode())
+            position, opened = start + 1, True
+            continue
+        if opened and buffer[start:start + 1] == ']':
+            return
+        if start < len(buffer):
+            try:
+                record, end = decoder.raw_decode(buffer, start)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ImportFormatError(f'Ошибка разбора JSON: {offset}')
+            else:
+                offset += len(buffer[position:end].encode())
+                position = end
+                yield record, offset
+                continue
+        if eof:
+            raise ImportFormatError('Массив JSON не закрыт.')
+        chunk = file.read(CHUNK_SIZE)
+        eof = not chunk
+        buffer = buffer[position:] + utf8.decode(chunk, final=eof)
+        position = 0
+
+
+def record_to_news(record):
+    """
+    Новость из записи фикстуры Django или из плоского объекта.
+
+    Записи других моделей пропускаются.
+    """
+    if 'fields' in record:
+        if record.get('model', 'news.news') != 'news.news':
+            return None
+        record = record['fields']
+    news_date = record.get('date')
+    news_date = date.fromisoformat(news_date) if news_date else date.today()
+    return News(
+        title=record['title'],
+        text=record['text'],
+        excerpt=make_excerpt(record['text']),
+        date=news_date,
+        content_hash=make_content_hash(record['title'], news_date),
+    )
+
+
+def import_chunk(chunk, batch_size):
+    """
+    Сохраняет новые новости одной транзакцией, пропуская дубли.
+
+    Дубли ищутся по отпечатку (заголовок, дата) и в базе, и внутри куска.
+    Возвращает число созданных новостей.
+    """
+    unique = {news.content_hash: news for news in chunk}
+    hashes = list(unique)
+    with transaction.atomic():
+        for start in range(0, len(hashes), HASH_LOOKUP_SIZE):
+            for content_hash in News.objects.filter(
+                content_hash__in=hashes[start:start + HASH_LOOKUP_SIZE]
+            ).values_list('content_hash', flat=True):
+                unique.pop(content_hash, None)
+        News.objects.bulk_create(unique.values(), batch_size=batch_size)
+    if unique:
+        bump_home()
+    return len(unique)
@@ -0,0 +1,194 @@
+import json
+import platform
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import reverse
+
+from news.benchmark import run_client, run_mixed, run_rate_limit, run_wsgi
+from news.models import Comment, News
+from news.moderation import drain
+from news.seeding import seed
+
+User = get_user_model()
+
+BENCH_USERNAME = 'bench'
+# Страница API из NEWS_API_PAGE_SIZE строк должна отвечать не медленнее
+# HTML-страницы с теми же данными: сценарий API → сценарий HTML.
+API_TARGETS = {
+    'api-news': 'home',
+    'api-comments': 'detail-long-thread',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет p50/p99 и запросы в секунду для главной, новости с '
+        'длинной веткой комментариев, тех же данных через JSON API '
+        'и отправки комментария — через '
+        'тестовый клиент и через WSGI-приложение из нескольких процессов. '
+        'Пишет данные в текущую базу, запускайте на отдельной копии.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=100_000)
+        parser.add_argument('--comments', type=int, default=10_000_000)
+        parser.add_argument(
+            '--skew', type=float, default=1.2,
+            help='Параметр распределения Парето: меньше — длиннее ветки.'
+        )
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Процессов нагрузки на WSGI-приложение, 0 — не запускать.'
+        )
+        parser.add_argument(
+            '--writers', type=int, default=2,
+            help='Процессов, пишущих комментарии, пока остальные читают '
+                 'главную; 0 — не запускать.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output', help='Куда записать JSON, по умолчанию stdout.'
+        )
+
+    # Ограничитель частоты отверг бы большую часть нагрузки;
+    # его собственная цена замеряется отдельно.
+    @override_settings(RATE_LIMITS={})
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING(
+                'DEBUG включён: результаты будут хуже, чем в бою.'
+            ))
+        self.seed(options)
+        user = User.objects.get_or_create(username=BENCH_USERNAME)[0]
+        thread = News.objects.order_by('-comment_count').first()
+        detail_url = reverse('news:detail', args=(thread.pk,))
+        scenarios = (
+            ('home-anonymous', None, 'get', reverse('news:home'), None),
+            ('home', user, 'get', reverse('news:home'), None),
+            ('detail-long-thread', user, 'get', detail_url, None),
+            # Те же данные через API: сравнивать с home
+            # и detail-long-thread.
+            ('api-news', user, 'get', reverse('news:api_news'), None),
+            ('api-comments', user, 'get',
+             reverse('news:api_comments', args=(thread.pk,)), None),
+            ('comment-post', user, 'post', detail_url,
+             {'text': 'Комментарий {}'}),
+        )
+        results = []
+        for name, scenario_user, method, url, data in scenarios:
+            results.append(self.report(name, 'client', run_client(
+                scenario_user, method, url, data, options['requests']
+            )))
+            if options['workers']:
+                results.append(self.report(name, 'wsgi', run_wsgi(
+                    scenario_user, method, url, data,
+                    options['requests'], options['workers']
+                )))
+        # Та же отправка комментария с отложенной модерацией и затем
+        # разбор накопившейся очереди.
+        with override_settings(COMMENT_MODERATION_ASYNC=True):
+            results.append(self.report('comment-post-async', 'client', (
+                run_client(user, 'post', detail_url,
+                           {'text': 'Комментарий {}'}, options['requests'])
+            )))
+            if options['workers']:
+                results.append(self.report('comment-post-async', 'wsgi', (
+                    run_wsgi(user, 'post', detail_url,
+                             {'text': 'Комментарий {}'},
+                             options['requests'], options['workers'])
+                )))
+        results.append(self.report('moderation-drain', 'threads', (
+            self.moderate()
+        )))
+        results.append(self.report('rate-limit-check', 'cache', (
+            run_rate_limit(options['requests'])
+        )))
+        if options['workers'] and options['writers']:
+            reads, writes = run_mixed(
+                user, reverse('news:home'), detail_url,
+                {'text': 'Комментарий {}'}, options['requests'],
+                options['workers'], options['writers']
+            )
+            results.append(self.report('home-during-writes', 'wsgi', reads))
+            results.append(
+                self.report('comment-post-during-reads', 'wsgi', writes)
+            )
+        report = json.dumps({
+            'project': 'ya_news',
+            'settings': settings.SETTINGS_MODULE,
+            'started': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'options': {
+                key: options[key] for key in (
+                    'news', 'comments', 'skew', 'users',
+                    'requests', 'workers', 'writers', 'seed'
+                )
+            },
+            'results': results,
+            'targets': self.check_targets(results),
+        }, ensure_ascii=False, indent=4)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(report + '\n')
+        else:
+            self.stdout.write(report)
+
+    def report(self, scenario, driver, result):
+        result = {'scenario': scenario, 'driver': driver, **result}
+        self.stderr.write(json.dumps(result, ensure_ascii=False))
+        return result
+
+    def check_targets(self, results):
+        """Сравнивает p50 страниц API и HTML с теми же данными."""
+        p50 = {
+            (result['scenario'], result['driver']): result.get('p50_ms')
+            for result in results
+        }
+        targets = []
+        for (scenario, driver), api_ms in p50.items():
+            html_ms = p50.get((API_TARGETS.get(scenario), driver))
+            if api_ms is None or html_ms is None:
+                continue
+            target = {
+                'scenario': scenario, 'driver': driver,
+                'compared_with': API_TARGETS[scenario],
+                'p50_ms': api_ms, 'target_p50_ms': html_ms,
+                'met': api_ms <= html_ms,
+            }
+            self.stderr.write(json.dumps(target, ensure_ascii=False))
+            targets.append(target)
+        return targets
+
+    def moderate(self):
+        start = time.perf_counter()
+        with ThreadPoolExecutor() as executor:
+            done = drain(executor, settings.COMMENT_MODERATION_BATCH_SIZE)
+        elapsed = time.perf_counter() - start
+        return {
+            'comments': sum(done.values()),
+            'per_second': round(sum(done.values()) / elapsed, 1),
+        }
+
+    def seed(self, options):
+        """Досоздаёт недостающие новости вместе с их комментариями."""
+        news = options['news'] - News.objects.count()
+        if news <= 0:
+            return
+        start = time.perf_counter()
+        seed(
+            random.Random(options['seed']), options['users'], news,
+            max(options['comments'] - Comment.objects.count(), 0),
+            options['skew']
+        )
+        self.stderr.write(
+            f'Данные готовы за {time.perf_counter() - start:.1f} с.'
+        )
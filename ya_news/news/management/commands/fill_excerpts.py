@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from news.cache import bump_home
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает начала текстов для главной страницы, например '
+        'после смены EXCERPT_WORDS или вставки новостей мимо моделей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = News.objects.fill_excerpts(options['batch'])
+        bump_home()
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено новостей: {updated}')
+        )
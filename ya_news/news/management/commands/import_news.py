@@ -0,0 +1,88 @@
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.importer import (
+    ImportFormatError, detect_format, import_chunk, read_json_array,
+    read_json_lines, record_to_news
+)
+
+READERS = {'json': read_json_array, 'jsonl': read_json_lines}
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково импортирует новости из JSON-массива (в том числе '
+        'фикстуры news.json) или JSON Lines. Дубли по заголовку и дате '
+        'пропускаются, прерванный импорт продолжается с ключом --resume.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=Path)
+        parser.add_argument('--format', choices=tuple(READERS))
+        parser.add_argument(
+            '--chunk-size', type=int, default=20000,
+            help='Сколько записей сохранять одной транзакцией.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Размер одного INSERT в bulk_create.'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с места, сохранённого в файле состояния.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        state_path = path.with_name(path.name + '.import-state')
+        offset = 0
+        if options['resume'] and state_path.exists():
+            offset = json.loads(state_path.read_text())['offset']
+            self.stdout.write(f'Продолжаем с байта {offset}.')
+        with open(path, 'rb') as file:
+            reader = READERS[options['format'] or detect_format(file)]
+            try:
+                totals = self.run(
+                    reader(file, offset), state_path,
+                    options['chunk_size'], options['batch_size']
+                )
+            except (ImportFormatError, KeyError, ValueError) as error:
+                raise CommandError(f'Файл не разобран: {error!r}')
+        state_path.unlink(missing_ok=True)
+        self.stdout.write(self.style.SUCCESS(
+            'Готово: прочитано {}, создано {}, за {:.1f} с.'.format(*totals)
+        ))
+
+    def run(self, records, state_path, chunk_size, batch_size):
+        started = time.perf_counter()
+        read = created = 0
+        chunk = []
+        offset = None
+        for record, offset in records:
+            news = record_to_news(record)
+            if news is not None:
+                chunk.append(news)
+            read += 1
+            if len(chunk) >= chunk_size:
+                created += self.save(chunk, offset, state_path, batch_size)
+                self.report(read, created, started)
+                chunk = []
+        if chunk:
+            created += self.save(chunk, offset, state_path, batch_size)
+        return read, created, time.perf_counter() - started
+
+    def save(self, chunk, offset, state_path, batch_size):
+        """Сохраняет кусок и только потом запоминает, докуда дочитали."""
+        created = import_chunk(chunk, batch_size)
+        state_path.write_text(json.dumps({'offset': offset}))
+        return created
+
+    def report(self, read, created, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Прочитано {read}, создано {created}, '
+            f'{read / elapsed:.0f} строк/с'
+        )
@@ -0,0 +1,45 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from news.moderation import drain, queue_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Разбирает очередь модерации комментариев пачками в пуле потоков. '
+        'По каждой пачке пишет JSON: сколько опубликовано и отклонено, '
+        'скорость и глубину очереди.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument(
+            '--batch', type=int,
+            default=settings.COMMENT_MODERATION_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Опрашивать очередь каждые N секунд, 0 — разобрать и выйти.'
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Только показать глубину очереди.'
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(queue_stats()))
+            return
+        with ThreadPoolExecutor(options['threads']) as executor:
+            while True:
+                drain(executor, options['batch'], self.report)
+                if not options['interval']:
+                    return
+                time.sleep(options['interval'])
+
+    def report(self, summary):
+        self.stdout.write(json.dumps(summary))
@@ -0,0 +1,46 @@
+import random
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from news.seeding import LAST_DAY, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро заполняет базу синтетическими пользователями, новостями '
+        'и комментариями. Число комментариев у новостей распределено '
+        'неравномерно; при одном --seed данные одинаковы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--news', type=int, default=100_000)
+        parser.add_argument('--comments', type=int, default=2_000_000)
+        parser.add_argument(
+            '--skew', type=float, default=1.2,
+            help='Параметр распределения Парето: меньше — длиннее ветки.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--last-day', type=date.fromisoformat, default=LAST_DAY,
+            help='Дата самых свежих новостей, ГГГГ-ММ-ДД.'
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        created = seed(
+            random.Random(options['seed']), options['users'],
+            options['news'], options['comments'], options['skew'],
+            options['last_day']
+        )
+        elapsed = time.perf_counter() - start
+        rows = sum(created.values())
+        counts = ', '.join(
+            f'{name} {count}' for name, count in created.items()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: {counts}. Всего {rows} строк за {elapsed:.1f} с '
+            f'({rows / elapsed:.0f} строк/с).'
+        ))
@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from news.replicas import snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу в реплики из DATABASE_REPLICAS. С ключом '
+        '--interval повторяет копирование каждые N секунд.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Период обновления в секундах, 0 — скопировать один раз.'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('В DATABASE_REPLICAS нет ни одной реплики.')
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                start = time.perf_counter()
+                snapshot(connections[alias].settings_dict['NAME'])
+                self.stdout.write(
+                    f'{alias}: {time.perf_counter() - start:.2f} с'
+                )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
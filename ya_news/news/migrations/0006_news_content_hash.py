@@ -0,0 +1,42 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:34
+
+import hashlib
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def fill_content_hash(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    last_id = 0
+    while True:
+        batch = list(
+            News.objects.filter(id__gt=last_id).order_by('id')
+            .only('id', 'title', 'date')[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        for news in batch:
+            news.content_hash = hashlib.blake2b(
+                f'{news.title}\x00{news.date.isoformat()}'.encode(),
+                digest_size=16
+            ).hexdigest()
+        News.objects.bulk_update(batch, ('content_hash',))
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='content_hash',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=32),
+        ),
+        migrations.RunPython(fill_content_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:29
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+BATCH_SIZE = 1000
+
+
+def fill_excerpt(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    last_id = 0
+    while True:
+        batch = list(
+            News.objects.filter(id__gt=last_id).order_by('id')
+            .only('id', 'text')[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        for news in batch:
+            news.excerpt = Truncator(news.text).words(15, truncate=' …')
+        News.objects.bulk_update(batch, ('excerpt',))
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_comment_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='excerpt',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(fill_excerpt, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0009_comment_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='flagged_words',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Найденные слова'),
+        ),
+    ]
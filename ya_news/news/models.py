@@ -1,24 +1,96 @@
+import hashlib
 from datetime import datetime
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.text import Truncator
+
+# Столько слов текста показывает главная страница.
+EXCERPT_WORDS = 15
+
+
+def make_content_hash(title, date):
+    """Отпечаток новости по заголовку и дате, для поиска дублей."""
+    if isinstance(date, datetime):
+        date = date.date()
+    return hashlib.blake2b(
+        f'{title}\x00{date.isoformat()}'.encode(), digest_size=16
+    ).hexdigest()
+
+
+def make_excerpt(text):
+    """Начало текста для главной, как у фильтра truncatewords."""
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+
+class NewsQuerySet(models.QuerySet):
+
+    def recount_comments(self):
+        """Пересчитывает счётчик опубликованных комментариев."""
+        comments = Comment.objects.filter(
+            news=OuterRef('pk'), status=Comment.Status.PUBLISHED
+        ).order_by().values('news').annotate(
+            total=Count('pk')
+        ).values('total')
+        return self.update(comment_count=Coalesce(Subquery(comments), 0))
+
+    def fill_excerpts(self, batch_size=1000):
+        """Пересчитывает excerpt пачками по id, возвращает число новостей."""
+        last_pk, total = 0, 0
+        while True:
+            batch = list(
+                self.filter(pk__gt=last_pk).order_by('pk')
+                .only('pk', 'text')[:batch_size]
+            )
+            if not batch:
+                return total
+            for news in batch:
+                news.excerpt = make_excerpt(news.text)
+            self.bulk_update(batch, ('excerpt',))
+            total += len(batch)
+            last_pk = batch[-1].pk
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
+    # Начало текста для главной: считается при сохранении, чтобы
+    # список не читал и не резал целые тексты.
+    excerpt = models.TextField(default='', editable=False)
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    content_hash = models.CharField(
+        max_length=32, db_index=True, default='', editable=False
+    )
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('date', 'id'), name='news_date_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.content_hash = make_content_hash(self.title, self.date)
+        self.excerpt = make_excerpt(self.text)
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'На модерации'
+        PUBLISHED = 'published', 'Опубликован'
+        REJECTED = 'rejected', 'Отклонён'
+
     news = models.ForeignKey(
         News,
         on_delete=models.CASCADE
@@ -29,9 +101,59 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PUBLISHED
+    )
+    # Запрещённые слова, за которые модерация отклонила комментарий.
+    flagged_words = models.TextField(
+        'Найденные слова', blank=True, default='', editable=False
+    )
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_thread_idx',
+            ),
+            # Список комментариев в админке: по дате во всей таблице.
+            models.Index(
+                fields=('created', 'id'), name='comment_created_idx'
+            ),
+            # Очередь модерации: маленький индекс только по ожидающим.
+            models.Index(
+                fields=('id',),
+                condition=Q(status='pending'),
+                name='comment_pending_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Запоминает, был ли комментарий опубликован в базе.
+
+        Если статус не загружен (only/defer), флаг None — «неизвестно»:
+        сигнал перед сохранением прочитает статус сам.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance.published_in_db = (
+            instance.status == cls.Status.PUBLISHED
+            if 'status' in field_names else None
+        )
+        return instance
+
+
+class BadWord(models.Model):
+    word = models.CharField('Слово', max_length=100, unique=True)
+
+    class Meta:
+        ordering = ('word',)
+        verbose_name = 'Запрещённое слово'
+        verbose_name_plural = 'Запрещённые слова'
+
+    def __str__(self):
+        return self.word
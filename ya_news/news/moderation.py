@@ -0,0 +1,198 @@
+"""
+Отложенная модерация комментариев.
+
+При COMMENT_MODERATION_ASYNC запрос сохраняет комментарий в статусе
+«на модерации» и сразу отвечает. Очередь — сами ожидающие строки
+таблицы под частичным индексом; команда moderate_comments забирает
+их пачками, проверяет в пуле потоков и публикует или отклоняет.
+Массовые действия админки идут через apply_in_chunks.
+"""
+import time
+from collections import Counter, defaultdict
+from functools import partial, reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .cache import bump_news
+from .events import publish_comment
+from .forms import flagged_words, profanity_filter
+from .models import Comment, News
+from .signals import change_comment_count, reset_now_and_on_commit
+
+Status = Comment.Status
+CHUNK_SIZE = 1000
+# Столько пар (id, текст) идёт в одно условие OR при применении вердиктов.
+UNCHANGED_CHUNK = 100
+
+
+def find_flagged_words(text):
+    """Запрещённые слова текста, '' — чисто; выполняется в потоках пула."""
+    return flagged_words(profanity_filter.find_all(text))
+
+
+def queue_stats():
+    """Глубина очереди и возраст самого старого ожидающего комментария."""
+    pending = Comment.objects.filter(status=Status.PENDING)
+    oldest = pending.order_by('pk').values_list('created', flat=True).first()
+    return {
+        'pending': pending.count(),
+        'oldest_seconds': round(
+            (timezone.now() - oldest).total_seconds(), 3
+        ) if oldest else 0,
+    }
+
+
+def unchanged(rows):
+    """
+    Условия «текст не менялся с проверки» для пар (id, текст) кусками.
+
+    Правка, сделанная после чтения пачки, не совпадёт с условием и
+    останется ожидать следующего прохода, а не получит старый вердикт.
+    Куски ограничивают глубину выражения OR в SQL.
+    """
+    for start in range(0, len(rows), UNCHANGED_CHUNK):
+        yield reduce(or_, (
+            Q(pk=pk, text=text)
+            for pk, text in rows[start:start + UNCHANGED_CHUNK]
+        ))
+
+
+def moderate_batch(executor, size):
+    """
+    Проверяет пачку ожидающих комментариев.
+
+    Возвращает, сколько опубликовано и отклонено, или None,
+    если очередь пуста.
+
+    Тексты проверяются вне транзакции: блокировка записи держится
+    только на время обновления статусов и счётчиков. Обновляются
+    лишь строки, всё ещё ожидающие модерации и с тем же текстом,
+    что проверялся, поэтому несколько обработчиков могут работать
+    одновременно, а отредактированный за это время комментарий
+    проверится заново.
+    """
+    batch = list(
+        Comment.objects.filter(status=Status.PENDING).order_by('pk')
+        .values_list('pk', 'news_id', 'text')[:size]
+    )
+    if not batch:
+        return None
+    verdicts = executor.map(
+        find_flagged_words, [text for _, _, text in batch]
+    )
+    # Отклонённые группируются по найденным словам: одна группа —
+    # одно обновление, а слова остаются модераторам.
+    accepted, rejected = [], defaultdict(list)
+    for (pk, _, text), words in zip(batch, verdicts):
+        (rejected[words] if words else accepted).append((pk, text))
+    with transaction.atomic():
+        pending = Comment.objects.filter(status=Status.PENDING)
+        comments = []
+        for condition in unchanged(accepted):
+            checked = pending.filter(condition)
+            comments += checked.values(
+                'id', 'news_id', 'author__username', 'text', 'created'
+            )
+            checked.update(status=Status.PUBLISHED)
+        published = Counter(comment['news_id'] for comment in comments)
+        rejected_count = sum(
+            pending.filter(condition).update(
+                status=Status.REJECTED, flagged_words=words
+            )
+            for words, rows in rejected.items()
+            for condition in unchanged(rows)
+        )
+        for news_id, count in published.items():
+            News.objects.filter(pk=news_id).update(
+                comment_count=F('comment_count') + count
+            )
+        for news_id in published:
+            reset_now_and_on_commit(partial(bump_news, news_id))
+        for comment in comments:
+            transaction.on_commit(partial(
+                publish_comment, comment['news_id'], {
+                    'id': comment['id'],
+                    'author': comment['author__username'],
+                    'text': comment['text'],
+                    'created': comment['created'],
+                }
+            ))
+    return {
+        'published': sum(published.values()), 'rejected': rejected_count
+    }
+
+
+def drain(executor, size, on_batch=None):
+    """Разбирает очередь до конца; on_batch получает сводку по пачке."""
+    totals = Counter()
+    while True:
+        start = time.perf_counter()
+        done = moderate_batch(executor, size)
+        if done is None:
+            return totals
+        totals.update(done)
+        if on_batch:
+            elapsed = time.perf_counter() - start
+            on_batch({
+                **done,
+                'per_second': round(sum(done.values()) / elapsed, 1),
+                **queue_stats(),
+            })
+
+
+def published_by_news(comments):
+    """Сколько опубликованных комментариев у каждой новости."""
+    return Counter(
+        comments.filter(status=Status.PUBLISHED)
+        .values_list('news_id', flat=True)
+    )
+
+
+def apply_in_chunks(comments, change):
+    """
+    Применяет change к комментариям пачками по CHUNK_SIZE id.
+
+    change(chunk) меняет строки пачки одним запросом и возвращает
+    их число. Сигналы при этом не срабатывают, поэтому счётчики
+    новостей правятся здесь — по разнице опубликованных до и после,
+    а страницы новостей сбрасываются, только если она есть.
+    Каждая пачка — своя транзакция: блокировка записи не держится
+    на всю операцию.
+    """
+    pks = list(comments.order_by('pk').values_list('pk', flat=True))
+    total = 0
+    for start in range(0, len(pks), CHUNK_SIZE):
+        chunk = Comment.objects.filter(pk__in=pks[start:start + CHUNK_SIZE])
+        with transaction.atomic():
+            before = published_by_news(chunk)
+            total += change(chunk)
+            after = published_by_news(chunk)
+            for news_id in before.keys() | after.keys():
+                delta = after[news_id] - before[news_id]
+                if delta:
+                    change_comment_count(news_id, delta)
+                    reset_now_and_on_commit(partial(bump_news, news_id))
+    return total
+
+
+def set_status(comments, status):
+    """Переводит комментарии в статус status, возвращает число изменённых."""
+    return apply_in_chunks(
+        comments, lambda chunk: chunk.exclude(status=status).update(
+            status=status
+        )
+    )
+
+
+def delete_comments(comments):
+    """
+    Удаляет комментарии без загрузки объектов и сигналов.
+
+    На комментарии ничто не ссылается, так что каскадов нет.
+    """
+    return apply_in_chunks(
+        comments, lambda chunk: chunk._raw_delete(chunk.db)
+    )
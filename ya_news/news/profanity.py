@@ -0,0 +1,171 @@
+import threading
+import time
+from collections import deque, namedtuple
+from pathlib import Path
+
+from django.conf import settings
+
+from .cache import bump_version, get_version
+
+BAD_WORDS_VERSION_KEY = 'news:bad_words:version'
+RELOAD_CHECK_INTERVAL = 5
+
+# Латинские буквы и цифры, похожие на кириллицу, приводим к кириллице.
+# Заглавные и строчные отдельно: H похожа на Н, а h на н — нет.
+HOMOGLYPHS = str.maketrans({
+    'A': 'А', 'B': 'В', 'C': 'С', 'E': 'Е', 'H': 'Н', 'K': 'К', 'M': 'М',
+    'O': 'О', 'P': 'Р', 'T': 'Т', 'X': 'Х', 'Y': 'У',
+    'a': 'а', 'c': 'с', 'e': 'е', 'k': 'к', 'o': 'о', 'p': 'р', 'x': 'х',
+    'y': 'у', '0': 'о', '3': 'з', '6': 'б', 'ё': 'е', 'Ё': 'Е',
+})
+
+Match = namedtuple('Match', ('start', 'end', 'word'))
+
+
+def normalize(text):
+    """
+    Приводит текст к виду для поиска.
+
+    Регистр, похожие латинские буквы и повторы символов не учитываются.
+    Вместе со строкой возвращаются границы каждого её символа
+    в исходном тексте.
+    """
+    chars, starts, ends = [], [], []
+    for index, char in enumerate(text.translate(HOMOGLYPHS).lower()):
+        if chars and chars[-1] == char:
+            ends[-1] = index + 1
+            continue
+        chars.append(char)
+        starts.append(index)
+        ends.append(index + 1)
+    return ''.join(chars), starts, ends
+
+
+class Automaton:
+    """
+    Автомат Ахо — Корасик для поиска всех слов списка за один проход.
+
+    Время поиска зависит от длины текста и числа найденных совпадений,
+    но не от размера списка слов.
+    """
+
+    def __init__(self, words):
+        self.transitions = [{}]
+        self.fail = [0]
+        self.output = [()]
+        for word in words:
+            self._add(word)
+        self._link()
+
+    def _add(self, word):
+        pattern = normalize(word.strip())[0]
+        if not pattern:
+            return
+        state = 0
+        for char in pattern:
+            if char not in self.transitions[state]:
+                self.transitions.append({})
+                self.fail.append(0)
+                self.output.append(())
+                self.transitions[state][char] = len(self.transitions) - 1
+            state = self.transitions[state][char]
+        self.output[state] += ((word.strip(), len(pattern)),)
+
+    def _link(self):
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in self.transitions[state].items():
+                queue.append(target)
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[target] = self.transitions[fallback].get(char, 0)
+                self.output[target] += self.output[self.fail[target]]
+
+    def find_all(self, text):
+        """Все вхождения слов с позициями в исходном тексте."""
+        normalized, starts, ends = normalize(text)
+        matches = []
+        state = 0
+        for index, char in enumerate(normalized):
+            while state and char not in self.transitions[state]:
+                state = self.fail[state]
+            state = self.transitions[state].get(char, 0)
+            for word, length in self.output[state]:
+                matches.append(
+                    Match(starts[index - length + 1], ends[index], word)
+                )
+        return matches
+
+
+class ProfanityFilter:
+    """
+    Список запрещённых слов, собранный в автомат.
+
+    Слова берутся из кода, из файла BAD_WORDS_FILE и из таблицы BadWord.
+    Автомат собирается один раз и пересобирается, когда меняется файл
+    или таблица; проверка делается не чаще RELOAD_CHECK_INTERVAL секунд.
+    """
+
+    def __init__(self, words=()):
+        self.words = tuple(words)
+        self._automaton = None
+        self._signature = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+
+    def find_all(self, text):
+        return self.get_automaton().find_all(text)
+
+    def get_automaton(self):
+        now = time.monotonic()
+        if (
+            self._automaton is None
+            or now - self._checked_at > RELOAD_CHECK_INTERVAL
+        ):
+            self._checked_at = now
+            signature = self._get_signature()
+            if self._automaton is None or signature != self._signature:
+                self.reload(signature)
+        return self._automaton
+
+    def reload(self, signature=None):
+        with self._lock:
+            self._signature = signature or self._get_signature()
+            self._automaton = Automaton(self._load_words())
+
+    def invalidate(self):
+        self._automaton = None
+
+    def _get_signature(self):
+        """
+        Время изменения файла и версия таблицы.
+
+        Отсутствующий файл (не создан или подменяется при ротации)
+        даёт mtime None, а не ошибку на каждом комментарии.
+        """
+        path = settings.BAD_WORDS_FILE
+        try:
+            mtime = Path(path).stat().st_mtime_ns if path else None
+        except OSError:
+            mtime = None
+        return mtime, get_version(BAD_WORDS_VERSION_KEY)
+
+    def _load_words(self):
+        from .models import BadWord
+
+        words = list(self.words)
+        if settings.BAD_WORDS_FILE:
+            try:
+                with open(settings.BAD_WORDS_FILE, encoding='utf-8') as file:
+                    words.extend(line for line in file if line.strip())
+            except OSError:
+                pass
+        words.extend(BadWord.objects.values_list('word', flat=True))
+        return words
+
+
+def bad_words_changed():
+    """Сообщает всем процессам, что список слов нужно пересобрать."""
+    bump_version(BAD_WORDS_VERSION_KEY)
@@ -1,6 +1,7 @@
 from datetime import timedelta, datetime
 import pytest
 
+from django.core.cache import cache
 from django.test.client import Client
 from django.utils import timezone
 from django.conf import settings
@@ -8,6 +9,11 @@ from django.conf import settings
 from news.models import News, Comment
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
 @pytest.fixture
 def author(django_user_model):
     return django_user_model.objects.create_user(username='Автор')
@@ -68,13 +74,39 @@ def count_news_on_home_page(news):
 @pytest.fixture
 def count_comments_on_news(news, author):
     now = timezone.now()
-    for index in range(10):
-        comment = Comment.objects.create(
-            news=news, author=author,
-            text=f'Tекст {index}',
-        )
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Tекст {index}')
+        for index in range(10)
+    )
+    comments = list(Comment.objects.filter(news=news).order_by('pk'))
+    for index, comment in enumerate(comments):
         comment.created = now + timedelta(days=index)
-        comment.save()
+    Comment.objects.bulk_update(comments, ('created',))
+    News.objects.filter(pk=news.pk).recount_comments()
+
+
+@pytest.fixture
+def searchable_news():
+    today = datetime.today()
+    return News.objects.bulk_create([
+        News(
+            title=f'Погода {index}',
+            text='Завтра ожидается <b>снег</b> и ветер.',
+            date=today - timedelta(days=index)
+        )
+        for index in range(settings.NEWS_COUNT_ON_SEARCH_PAGE + 5)
+    ] + [
+        News(title='Снег в городе', text='Снегопад.', date=today),
+        News(title='Спорт', text='Футбол.', date=today),
+    ])
+
+
+@pytest.fixture
+def long_comment_thread(news, author):
+    return Comment.objects.bulk_create([
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(settings.COMMENTS_COUNT_ON_PAGE * 2 + 1)
+    ])
 
 
 @pytest.fixture
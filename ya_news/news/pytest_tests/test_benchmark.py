@@ -0,0 +1,40 @@
+import io
+import json
+
+import pytest
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.management import call_command
+
+from news.benchmark import make_environ
+
+
+@pytest.mark.django_db
+def test_benchmark_writes_json_report(tmp_path):
+    output = tmp_path / 'benchmark.json'
+    call_command(
+        'benchmark', news=5, comments=30, users=2, requests=3,
+        workers=0, output=output, stderr=io.StringIO()
+    )
+    report = json.loads(output.read_text())
+    results = report['results']
+    assert {result['scenario'] for result in results} == {
+        'home-anonymous', 'home', 'detail-long-thread', 'api-news',
+        'api-comments', 'comment-post', 'comment-post-async',
+        'moderation-drain', 'rate-limit-check'
+    }
+    assert all(result.get('errors', 0) == 0 for result in results)
+    assert [
+        (target['scenario'], target['compared_with'])
+        for target in report['targets']
+    ] == [('api-news', 'home'), ('api-comments', 'detail-long-thread')]
+
+
+def test_wsgi_environ_carries_query_body_and_cookies():
+    request = WSGIRequest(make_environ(
+        'post', '/news/1/?page=2', b'text=%D0%BF', {'sessionid': 'abc'}
+    ))
+    assert request.method == 'POST'
+    assert request.path == '/news/1/'
+    assert request.GET['page'] == '2'
+    assert request.POST['text'] == 'п'
+    assert request.COOKIES['sessionid'] == 'abc'
@@ -1,9 +1,20 @@
+import re
+from http import HTTPStatus
+
 import pytest
 
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from news.forms import CommentForm
+from news.pagination import encode_cursor
+from news.search import build_match, search_news
+from news.models import Comment, News
+
+COMMENT_TEXT = re.compile(r'<p class="mb-0">(.*?)</p>')
+NEXT_PAGE_LINK = re.compile(r'href="([^"?]+)\?after=([\w-]+)"')
 
 
 @pytest.mark.django_db
@@ -23,6 +34,32 @@ def test_news_order(client, news, count_news_on_home_page):
     assert all_dates == sorted_dates
 
 
+@pytest.mark.django_db
+def test_home_page_does_not_load_comments(
+        client, news, count_news_on_home_page, count_comments_on_news
+):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('news:home'))
+    assert not any(
+        'news_comment' in query['sql'] for query in queries
+    )
+    news.refresh_from_db()
+    assert news.comment_count == 10
+    assert f'Комментариев: {news.comment_count}' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_home_page_does_not_load_text(client, news):
+    news.text = 'Длинный текст новости. ' * 1000
+    news.save()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('news:home'))
+    assert not any(
+        '"news_news"."text"' in query['sql'] for query in queries
+    )
+    assert news.excerpt in response.content.decode()
+
+
 @pytest.mark.django_db
 def test_comments_order(client, news, news_id, count_comments_on_news):
     detail_url = reverse('news:detail', args=news_id)
@@ -35,6 +72,86 @@ def test_comments_order(client, news, news_id, count_comments_on_news):
     assert all_timestamps == sorted_comments
 
 
+def read_comment_thread(user, news_id):
+    """Тексты всей ветки по ссылкам «Показать ещё», как видит читатель."""
+    html = user.get(reverse('news:detail', args=news_id)).content.decode()
+    shown = []
+    while True:
+        page = COMMENT_TEXT.findall(html)
+        assert len(page) <= settings.COMMENTS_COUNT_ON_PAGE
+        shown += page
+        link = NEXT_PAGE_LINK.search(html)
+        if not link:
+            return shown
+        assert link.group(1) == reverse('news:comments', args=news_id)
+        response = user.get(link.group(1), {'after': link.group(2)})
+        html = response.content.decode()
+
+
+@pytest.mark.django_db
+def test_comments_are_paginated(client, news_id, long_comment_thread):
+    assert read_comment_thread(client, news_id) == list(
+        Comment.objects.order_by('created', 'id').values_list(
+            'text', flat=True
+        )
+    )
+
+
+@pytest.mark.django_db
+def test_cached_comment_pages_keep_pagination(
+        client, author_client, news_id, long_comment_thread
+):
+    shown = read_comment_thread(client, news_id)
+    with CaptureQueriesContext(connection) as queries:
+        assert read_comment_thread(author_client, news_id) == shown
+    assert not any('news_comment' in query['sql'] for query in queries)
+
+
+@pytest.mark.django_db
+def test_comment_thread_is_shared_between_users(
+        author_client, not_author_client, comment, news_id
+):
+    detail_url = reverse('news:detail', args=news_id)
+    edit_url = reverse('news:edit', args=(comment.pk,))
+    assert edit_url in author_client.get(detail_url).content.decode()
+    with CaptureQueriesContext(connection) as queries:
+        content = not_author_client.get(detail_url).content.decode()
+    assert comment.text in content
+    assert edit_url not in content
+    assert not any('news_comment' in query['sql'] for query in queries)
+
+
+@pytest.mark.django_db
+def test_comment_thread_changes_with_comments(
+        author_client, comment, news_id
+):
+    detail_url = reverse('news:detail', args=news_id)
+    author_client.get(detail_url)
+    author_client.post(
+        reverse('news:edit', args=(comment.pk,)), {'text': 'Исправлено'}
+    )
+    assert 'Исправлено' in author_client.get(detail_url).content.decode()
+    author_client.post(reverse('news:delete', args=(comment.pk,)))
+    assert 'Исправлено' not in author_client.get(detail_url).content.decode()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'cursor',
+    (
+        'broken',
+        encode_cursor(['abc', 1]),
+        encode_cursor([{'a': 1}, 1]),
+        encode_cursor([None, None]),
+    )
+)
+def test_broken_cursor_returns_not_found(client, news_id, cursor):
+    response = client.get(
+        reverse('news:comments', args=news_id), {'after': cursor}
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
 @pytest.mark.django_db
 def test_anonymous_client_has_no_form(client, news_id):
     detail_url = reverse('news:detail', args=news_id)
@@ -48,3 +165,141 @@ def test_authorized_client_has_form(author_client, news_id):
     response = author_client.get(detail_url)
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+@pytest.mark.django_db
+def test_search_ranks_title_matches_first(client, searchable_news):
+    response = client.get(reverse('news:search'), {'q': 'снег'})
+    results = response.context['results']
+    assert results[0].title == '<mark>Снег</mark> в городе'
+    assert '&lt;b&gt;<mark>снег</mark>&lt;/b&gt;' in results[1].snippet
+    assert 'Спорт' not in [hit.title for hit in results]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query', ('снег,', '"снег"', '(снег*)', 'снег-'))
+def test_search_ignores_punctuation_and_syntax(searchable_news, query):
+    assert build_match(query) == '"снег"'
+    assert [hit.id for hit in search_news(query)[0]] == [
+        hit.id for hit in search_news('снег')[0]
+    ]
+
+
+@pytest.mark.django_db
+def test_search_pages_do_not_repeat(searchable_news):
+    seen, cursor = [], None
+    while True:
+        hits, cursor = search_news('снег', cursor=cursor, size=7)
+        seen += [hit.id for hit in hits]
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == len(searchable_news) - 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'params',
+    (
+        {'q': 'снег', 'after': encode_cursor([{'a': 1}, 1, 2])},
+        {'q': 'снег', 'after': encode_cursor([0.5, 'вчера', 1])},
+        {'q': 'снег', 'after': encode_cursor([0.5, '2020-01-01', None])},
+        {'date_from': '2020-01-01', 'after': encode_cursor(['x', 1])},
+    )
+)
+def test_search_broken_cursor_returns_not_found(
+    client, searchable_news, params
+):
+    response = client.get(reverse('news:search'), params)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_search_filters_by_date(searchable_news):
+    day = searchable_news[3].date.date()
+    hits, _ = search_news('снег', date_from=day, date_to=day)
+    assert [hit.title for hit in hits] == [searchable_news[3].title]
+    hits, _ = search_news('', date_from=day, date_to=day)
+    assert [hit.title for hit in hits] == [searchable_news[3].title]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'params',
+    ({'q': 'снег', 'date_from': '2020-01-01'}, {'date_from': '2020-01-01'})
+)
+def test_search_does_not_scan_news_table(client, searchable_news, params):
+    with CaptureQueriesContext(connection) as queries:
+        client.get(reverse('news:search'), params)
+    with connection.cursor() as cursor:
+        for query in queries:
+            cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+            plan = [row[-1] for row in cursor.fetchall()]
+            assert not {'SCAN n', 'SCAN news_news'} & set(plan), plan
+
+
+@pytest.mark.django_db
+def test_api_news_pages_follow_home_order(
+        client, settings, news, count_news_on_home_page
+):
+    settings.NEWS_API_PAGE_SIZE = 4
+    seen, url = [], reverse('news:api_news')
+    while url:
+        data = client.get(url).json()
+        seen += data['results']
+        url = data['next']
+    expected = News.objects.order_by('-date', '-id')
+    assert [row['id'] for row in seen] == [item.id for item in expected]
+    assert set(seen[0]) == {
+        'id', 'title', 'date', 'excerpt', 'comment_count'
+    }
+
+
+@pytest.mark.django_db
+def test_api_sparse_fields(client, news):
+    url = reverse('news:api_news')
+    response = client.get(url, {'fields': 'title,id'})
+    assert response.json()['results'] == [
+        {'title': news.title, 'id': news.id}
+    ]
+    response = client.get(url, {'fields': 'title,password'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_api_comments_etag_follows_thread(client, author, news, comment):
+    url = reverse('news:api_comments', args=(news.id,))
+    response = client.get(url)
+    assert response.json()['results'] == [{
+        'id': comment.id,
+        'author': author.username,
+        'text': comment.text,
+        'created': response.json()['results'][0]['created'],
+    }]
+    etag = response['ETag']
+    assert client.get(
+        url, HTTP_IF_NONE_MATCH=etag
+    ).status_code == HTTPStatus.NOT_MODIFIED
+    news_etag = client.get(reverse('news:api_news'))['ETag']
+    Comment.objects.create(news=news, author=author, text='Ещё')
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()['results']) == 2
+    assert client.get(
+        reverse('news:api_news'), HTTP_IF_NONE_MATCH=news_etag
+    ).status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_api_page_is_served_from_cache(
+        client, comment, news_id, django_assert_num_queries
+):
+    url = reverse('news:api_comments', args=news_id)
+    content = client.get(url).content
+    with django_assert_num_queries(0):
+        assert client.get(url).content == content
+
+
+@pytest.mark.django_db
+def test_api_comments_of_missing_news(client):
+    response = client.get(reverse('news:api_comments', args=(1,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
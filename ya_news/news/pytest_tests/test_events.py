@@ -0,0 +1,217 @@
+import asyncio
+from datetime import datetime
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from news.events import (
+    CommentEvents, comment_event, events_news_id, get_broker, publish_comment
+)
+from news.models import News
+
+
+def open_event_streams(app, path, sends):
+    """Подписчики потока событий: по задаче на каждую функцию send."""
+    disconnected = asyncio.Event()
+
+    async def receive():
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    scope = {'type': 'http', 'path': path}
+    tasks = [
+        asyncio.ensure_future(app(scope, receive, send)) for send in sends
+    ]
+    return tasks, disconnected
+
+
+def collect(messages):
+    async def send(message):
+        messages.append(message)
+    return send
+
+
+async def wait_until(condition, timeout=30):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+@pytest.mark.django_db
+def test_event_stream_address_comes_from_url_conf(client, news):
+    url = reverse('news:events', args=(news.pk,))
+    assert url in client.get(
+        reverse('news:detail', args=(news.pk,))
+    ).content.decode()
+    for scope in (
+        {'type': 'http', 'path': url},
+        {'type': 'http', 'path': f'/prefix{url}', 'root_path': '/prefix'},
+    ):
+        assert events_news_id(scope) == news.pk
+    for scope in (
+        {'type': 'http', 'path': reverse('news:detail', args=(news.pk,))},
+        {'type': 'websocket', 'path': url},
+    ):
+        assert events_news_id(scope) is None
+    assert client.get(url).status_code == HTTPStatus.NO_CONTENT
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_event_reaches_every_subscriber_of_its_news(news):
+    other_news = News.objects.create(title='Другая', text='Текст')
+    comment = {
+        'id': 7, 'author': 'Автор', 'text': 'Новый\nкомментарий',
+        'created': datetime(2026, 1, 1, 12, 0),
+    }
+
+    async def scenario():
+        boxes = [[] for _ in range(3)]
+        other = []
+        tasks, disconnected = open_event_streams(
+            CommentEvents(None), reverse('news:events', args=(news.pk,)),
+            [collect(box) for box in boxes]
+        )
+        other_tasks, other_disconnected = open_event_streams(
+            CommentEvents(None), reverse('news:events', args=(other_news.pk,)),
+            [collect(other)]
+        )
+        await wait_until(
+            lambda: all(len(box) == 2 for box in (*boxes, other))
+        )
+        await asyncio.get_running_loop().run_in_executor(
+            None, publish_comment, news.pk, comment
+        )
+        await wait_until(lambda: all(len(box) == 3 for box in boxes))
+        disconnected.set()
+        other_disconnected.set()
+        await asyncio.gather(*tasks, *other_tasks)
+        return boxes, other
+
+    boxes, other = asyncio.run(scenario())
+    event = comment_event(comment)
+    assert event.count(b'\n') == 4
+    assert all(box[2]['body'] == event for box in boxes)
+    assert event not in [message.get('body') for message in other]
+    assert not get_broker().subscriptions
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_event_reaches_10k_subscribers(news):
+    subscribers = 10_000
+    comment = {
+        'id': 7, 'author': 'Автор', 'text': 'Новый\nкомментарий',
+        'created': datetime(2026, 1, 1, 12, 0),
+    }
+
+    async def scenario():
+        boxes = [[] for _ in range(subscribers)]
+        tasks, disconnected = open_event_streams(
+            CommentEvents(None), reverse('news:events', args=(news.pk,)),
+            [collect(box) for box in boxes]
+        )
+        await wait_until(lambda: all(len(box) == 2 for box in boxes))
+        await asyncio.get_running_loop().run_in_executor(
+            None, publish_comment, news.pk, comment
+        )
+        await wait_until(lambda: all(len(box) == 3 for box in boxes))
+        disconnected.set()
+        await asyncio.gather(*tasks)
+        return boxes
+
+    boxes = asyncio.run(scenario())
+    event = comment_event(comment)
+    assert all(box[2]['body'] == event for box in boxes)
+    assert not get_broker().subscriptions
+
+
+@pytest.mark.django_db(transaction=True)
+def test_event_stream_of_missing_news_not_found():
+
+    async def scenario():
+        messages = []
+        tasks, _ = open_event_streams(
+            CommentEvents(None), reverse('news:events', args=(1,)),
+            [collect(messages)]
+        )
+        await asyncio.gather(*tasks)
+        return messages
+
+    messages = asyncio.run(scenario())
+    assert messages[0]['status'] == HTTPStatus.NOT_FOUND
+    assert not get_broker().subscriptions
+
+
+@pytest.mark.django_db(transaction=True)
+def test_slow_event_subscriber_is_dropped(settings, news):
+    settings.NEWS_EVENTS_QUEUE_SIZE = 2
+    comment = {
+        'id': 1, 'author': 'a', 'text': 't', 'created': datetime(2026, 1, 1)
+    }
+
+    async def scenario():
+        fast, slow, stuck = [], [], asyncio.Event()
+
+        async def slow_send(message):
+            slow.append(message)
+            if len(slow) > 2:
+                await stuck.wait()
+
+        tasks, disconnected = open_event_streams(
+            CommentEvents(None), reverse('news:events', args=(news.pk,)),
+            [collect(fast), slow_send]
+        )
+        await wait_until(lambda: len(fast) == 2 and len(slow) == 2)
+        for sent in range(1, 6):
+            publish_comment(news.pk, comment)
+            await wait_until(lambda: len(fast) == 2 + sent)
+        subscribers = len(get_broker().subscriptions[news.pk])
+        disconnected.set()
+        stuck.set()
+        await asyncio.gather(*tasks)
+        return fast, subscribers
+
+    fast, subscribers = asyncio.run(scenario())
+    assert subscribers == 1
+    assert [message['body'] for message in fast[2:-1]] == [
+        comment_event(comment)
+    ] * 5
+
+
+@pytest.mark.django_db(transaction=True)
+def test_quiet_event_stream_gets_pings(settings, news):
+    settings.NEWS_EVENTS_KEEPALIVE = 0.01
+
+    async def scenario():
+        messages = []
+        tasks, disconnected = open_event_streams(
+            CommentEvents(None), reverse('news:events', args=(news.pk,)),
+            [collect(messages)]
+        )
+        await wait_until(lambda: len(messages) >= 4)
+        disconnected.set()
+        await asyncio.gather(*tasks)
+        return messages
+
+    messages = asyncio.run(scenario())
+    assert messages[2]['body'] == messages[3]['body'] == b': ping\n\n'
+
+
+@pytest.mark.django_db
+def test_posted_comment_is_published(
+        author_client, news, monkeypatch, django_capture_on_commit_callbacks
+):
+    published = []
+    monkeypatch.setattr(
+        get_broker(), 'publish', lambda key, event: published.append(
+            (key, event)
+        )
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(
+            reverse('news:detail', args=(news.pk,)), {'text': 'Привет'}
+        )
+    assert len(published) == 1
+    assert published[0][0] == news.pk
+    assert '"text": "Привет"' in published[0][1].decode()
@@ -0,0 +1,52 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from news import importer
+from news.models import News
+
+
+@pytest.mark.django_db
+def test_import_fixture_skips_duplicates():
+    fixture = Path(importer.__file__).parent / 'fixtures' / 'news.json'
+    records = json.loads(fixture.read_text(encoding='utf-8'))
+    call_command('import_news', fixture, stdout=io.StringIO())
+    call_command('import_news', fixture, stdout=io.StringIO())
+    assert News.objects.count() == len(records)
+    assert not News.objects.filter(content_hash='').exists()
+
+
+def test_json_array_is_read_across_chunks(monkeypatch):
+    monkeypatch.setattr(importer, 'CHUNK_SIZE', 5)
+    records = [
+        {'title': f'Новость {index}', 'text': 'Ёж'} for index in range(3)
+    ]
+    data = json.dumps(records, ensure_ascii=False).encode()
+    parsed = list(importer.read_json_array(io.BytesIO(data)))
+    assert [record for record, _ in parsed] == records
+    _, offset = parsed[0]
+    resumed = importer.read_json_array(io.BytesIO(data), offset)
+    assert [record for record, _ in resumed] == records[1:]
+
+
+@pytest.mark.django_db
+def test_import_resumes_after_interruption(tmp_path):
+    path = tmp_path / 'news.jsonl'
+    lines = [
+        json.dumps({'title': f'Новость {index}', 'text': 'Текст',
+                    'date': '2022-01-01'})
+        for index in range(5)
+    ]
+    path.write_text('\n'.join(lines) + '\n')
+    offset = len('\n'.join(lines[:2]).encode()) + 1
+    (tmp_path / 'news.jsonl.import-state').write_text(
+        json.dumps({'offset': offset})
+    )
+    call_command('import_news', path, '--resume', stdout=io.StringIO())
+    assert sorted(News.objects.values_list('title', flat=True)) == [
+        'Новость 2', 'Новость 3', 'Новость 4'
+    ]
+    assert not (tmp_path / 'news.jsonl.import-state').exists()
@@ -1,11 +1,23 @@
+import io
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
 
 import pytest
+from django.core.management import call_command
+from django.http import HttpResponse
 from django.urls import reverse
+from django.utils.http import http_date
 from pytest_django.asserts import assertFormError, assertRedirects
 
-from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.cache import get_or_render, get_version, news_version_key
+from news import admin, moderation
+from news.forms import BAD_WORDS, WARNING, CommentForm
+from news.models import BadWord, Comment, News, make_excerpt
+from news.profanity import Automaton, ProfanityFilter
+from news.ratelimit import retry_after
 
 
 @pytest.mark.django_db
@@ -30,6 +42,8 @@ def test_user_can_create_comment(
     assert comment.author == author
     assert comment.news == news
     assert comment.text == form_data['text']
+    news.refresh_from_db()
+    assert news.comment_count == 1
 
 
 def test_user_cant_use_bad_words(author_client, news_id):
@@ -44,6 +58,238 @@ def test_user_cant_use_bad_words(author_client, news_id):
     assert comments_count == 0
 
 
+@pytest.mark.django_db
+def test_async_moderation_publishes_and_rejects(
+        settings, author_client, news
+):
+    settings.COMMENT_MODERATION_ASYNC = True
+    news_url = reverse('news:detail', args=(news.pk,))
+    for text in ('Хорошая новость', f'Ты {BAD_WORDS[0]}'):
+        response = author_client.post(news_url, data={'text': text})
+        assert response.status_code == HTTPStatus.FOUND
+    assert set(Comment.objects.values_list('status', flat=True)) == {
+        Comment.Status.PENDING
+    }
+    news.refresh_from_db()
+    assert news.comment_count == 0
+    assert 'Хорошая' not in author_client.get(news_url).content.decode()
+    output = io.StringIO()
+    call_command('moderate_comments', threads=2, stdout=output)
+    summary = json.loads(output.getvalue().splitlines()[0])
+    assert (summary['published'], summary['rejected']) == (1, 1)
+    assert summary['pending'] == 0
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert 'Хорошая новость' in author_client.get(news_url).content.decode()
+    rejected = Comment.objects.get(status=Comment.Status.REJECTED)
+    assert rejected.flagged_words == BAD_WORDS[0]
+
+
+@pytest.mark.django_db
+def test_admin_shows_flagged_words(admin_client, author, news):
+    comment = Comment.objects.create(
+        news=news, author=author, text=f'{BAD_WORDS[1]} и {BAD_WORDS[0]}',
+        status=Comment.Status.PENDING
+    )
+    moderation.moderate_batch(ThreadPoolExecutor(), 10)
+    comment.refresh_from_db()
+    assert comment.flagged_words == f'{BAD_WORDS[1]}, {BAD_WORDS[0]}'
+    for url in (
+        reverse('admin:news_comment_changelist'),
+        reverse('admin:news_comment_change', args=(comment.pk,)),
+    ):
+        assert comment.flagged_words in admin_client.get(
+            url
+        ).content.decode()
+
+
+@pytest.mark.django_db
+def test_comment_edited_during_moderation_is_checked_again(author, news):
+    comment = Comment.objects.create(
+        news=news, author=author, text='Хорошая новость',
+        status=Comment.Status.PENDING
+    )
+
+    class EditingExecutor:
+        """Пул, в котором автор правит текст, пока идёт проверка."""
+
+        def map(self, check, texts):
+            verdicts = list(map(check, texts))
+            Comment.objects.filter(pk=comment.pk).update(
+                text=f'Ты {BAD_WORDS[0]}'
+            )
+            return verdicts
+
+    done = moderation.moderate_batch(EditingExecutor(), 10)
+    assert done == {'published': 0, 'rejected': 0}
+    comment.refresh_from_db()
+    news.refresh_from_db()
+    assert comment.status == Comment.Status.PENDING
+    assert news.comment_count == 0
+    done = moderation.moderate_batch(EditingExecutor(), 10)
+    assert done == {'published': 0, 'rejected': 1}
+    comment.refresh_from_db()
+    assert comment.status == Comment.Status.REJECTED
+
+
+@pytest.mark.django_db
+def test_admin_actions_keep_counter_and_pages(
+        admin_client, monkeypatch, author, news
+):
+    monkeypatch.setattr(moderation, 'CHUNK_SIZE', 2)
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Текст {index}',
+                status=Comment.Status.PENDING)
+        for index in range(5)
+    )
+    news_url = reverse('news:detail', args=(news.pk,))
+    changelist = reverse('admin:news_comment_changelist')
+    pks = list(Comment.objects.values_list('pk', flat=True))
+    admin_client.get(news_url)
+    for action, count in (
+        ('publish', 5), ('reject', 2), ('delete_chunked', 0)
+    ):
+        response = admin_client.post(changelist, {
+            'action': action,
+            '_selected_action': pks[:3] if action == 'reject' else pks,
+        })
+        assert response.status_code == HTTPStatus.FOUND
+        news.refresh_from_db()
+        assert news.comment_count == count
+        page = admin_client.get(news_url).content.decode()
+        assert ('Текст 0' in page) == (action == 'publish')
+        assert ('Текст 4' in page) == (action != 'delete_chunked')
+    assert not Comment.objects.exists()
+
+
+@pytest.mark.django_db
+def test_admin_news_page_caps_comment_inline(
+        admin_client, author, news, django_assert_max_num_queries
+):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Текст {index}')
+        for index in range(admin.INLINE_COMMENTS + 5)
+    )
+    with django_assert_max_num_queries(20):
+        response = admin_client.get(
+            reverse('admin:news_news_change', args=(news.pk,))
+        )
+    formset = response.context['inline_admin_formsets'][0].formset
+    assert len(formset.forms) == admin.INLINE_COMMENTS
+    response = admin_client.get(
+        reverse('admin:news_comment_changelist'),
+        {'news__id__exact': news.pk, 'created__gte': '2000-01-01 00:00+00:00'}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_edited_comment_waits_for_moderation_again(
+        settings, author_client, comment, news
+):
+    settings.COMMENT_MODERATION_ASYNC = True
+    author_client.post(
+        reverse('news:edit', args=(comment.pk,)), {'text': 'Исправлено'}
+    )
+    comment.refresh_from_db()
+    news.refresh_from_db()
+    assert comment.status == Comment.Status.PENDING
+    assert news.comment_count == 0
+    comment.delete()
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_comment_loaded_without_status_keeps_counter(comment, news):
+    for comments in (
+        Comment.objects.only('pk', 'news', 'text'),
+        Comment.objects.defer('status'),
+    ):
+        loaded = comments.get(pk=comment.pk)
+        assert loaded.published_in_db is None
+        loaded.text = 'Исправлено'
+        loaded.save()
+        news.refresh_from_db()
+        assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_comment_rate_limit(settings, author_client, news_id, form_data):
+    settings.RATE_LIMITS = {'comment': (2, 60)}
+    news_url = reverse('news:detail', args=news_id)
+    for _ in range(2):
+        response = author_client.post(news_url, data=form_data)
+        assert response.status_code == HTTPStatus.FOUND
+    response = author_client.post(news_url, data=form_data)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert int(response['Retry-After']) >= 1
+    assert Comment.objects.count() == 2
+    assert author_client.get(news_url).status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_write_rate_limit_counts_ip(settings, client, news_id):
+    settings.RATE_LIMITS = {'writes': (1, 60)}
+    login_url = reverse('users:login')
+    assert client.post(login_url).status_code == HTTPStatus.OK
+    response = client.post(login_url)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_retry_after_follows_sliding_window():
+    # Текущее окно переполнено: ждать его конца и ещё пока вес упадёт.
+    assert retry_after(5, 0, 10, 4, 60) == 62
+    # Мешает прошлое окно: ждать, пока его вес упадёт.
+    assert retry_after(2, 4, 0, 4, 60) == 30
+
+
+def test_bad_words_found_with_positions():
+    text = 'Ну ты РЕДИИИСКА и нeгoдяй'
+    matches = Automaton(BAD_WORDS).find_all(text)
+    assert [text[match.start:match.end] for match in matches] == [
+        'РЕДИИИСКА', 'нeгoдяй'
+    ]
+    assert [match.word for match in matches] == list(BAD_WORDS)
+
+
+def test_overlapping_bad_words_are_all_found():
+    matches = Automaton(('he', 'she', 'hers')).find_all('ushers')
+    assert sorted(match.word for match in matches) == ['he', 'hers', 'she']
+
+
+def test_latin_text_is_not_taken_for_cyrillic_bad_word():
+    automaton = Automaton(('пух', 'нить'))
+    assert automaton.find_all('Nyx, hunt and unit') == []
+    assert [match.word for match in automaton.find_all('ПYX')] == ['пух']
+
+
+@pytest.mark.django_db
+def test_missing_bad_words_file_is_skipped(settings, tmp_path):
+    path = tmp_path / 'bad_words.txt'
+    path.write_text('лопух\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(path)
+    bad_words = ProfanityFilter(BAD_WORDS)
+    assert bad_words.find_all('Ты лопух')
+    path.unlink()
+    bad_words.invalidate()
+    assert not bad_words.find_all('Ты лопух')
+    assert bad_words.find_all(f'Ты {BAD_WORDS[0]}')
+
+
+@pytest.mark.django_db
+def test_bad_words_table_is_reloaded():
+    form = CommentForm(data={'text': 'Ты лопух'})
+    assert form.is_valid()
+    word = BadWord.objects.create(word='лопух')
+    try:
+        form = CommentForm(data={'text': 'Ты ЛОПУХ'})
+        assert not form.is_valid()
+        assert form.bad_words[0].word == 'лопух'
+    finally:
+        word.delete()
+
+
 def test_author_can_delete_comment(
         author_client, comment, comment_id, news_id
 ):
@@ -53,6 +299,27 @@ def test_author_can_delete_comment(
     response = author_client.delete(delete_url)
     assertRedirects(response, url_to_comments)
     assert Comment.objects.count() == 0
+    assert News.objects.get(pk=news_id[0]).comment_count == 0
+
+
+@pytest.mark.django_db
+def test_recount_comments_repairs_counter(comment, news):
+    News.objects.update(comment_count=100)
+    call_command('recount_comments')
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_fill_excerpts_repairs_excerpt(news):
+    news.text = ' '.join(f'слово{index}' for index in range(40))
+    news.save()
+    assert news.excerpt == make_excerpt(news.text)
+    assert news.excerpt.endswith('слово14 …')
+    News.objects.update(excerpt='')
+    call_command('fill_excerpts', batch=1, stdout=io.StringIO())
+    news.refresh_from_db()
+    assert news.excerpt == make_excerpt(news.text)
 
 
 def test_author_can_edit_comment(
@@ -99,3 +366,81 @@ def test_user_cant_edit_comment_of_another_user(
     assert comment.author == author
     assert comment.news == news
     assert comment.text != form_data['text']
+
+
+@pytest.mark.django_db
+def test_anonymous_pages_are_cached(
+        client, news_id, django_assert_num_queries
+):
+    for url in (reverse('news:home'), reverse('news:detail', args=news_id)):
+        response = client.get(url)
+        with django_assert_num_queries(0):
+            cached_response = client.get(url)
+        assert cached_response.content == response.content
+
+
+@pytest.mark.django_db
+def test_new_comment_resets_only_its_news_page(client, author, news):
+    other_news = News.objects.create(title='Другая', text='Текст')
+    other_version = get_version(news_version_key(other_news.pk))
+    detail_url = reverse('news:detail', args=(news.pk,))
+    client.get(detail_url)
+    Comment.objects.create(news=news, author=author, text='Свежий')
+    response = client.get(detail_url)
+    assert 'Свежий' in response.content.decode()
+    assert get_version(news_version_key(other_news.pk)) == other_version
+
+
+def test_cache_miss_burst_renders_once():
+    renders = []
+
+    def render():
+        renders.append(1)
+        time.sleep(0.1)
+        return HttpResponse('page')
+
+    threads = [
+        threading.Thread(
+            target=get_or_render, args=('news:test:burst', render, 60)
+        )
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(renders) == 1
+
+
+@pytest.mark.django_db
+def test_unchanged_page_is_not_modified(
+        client, author, news, django_assert_num_queries
+):
+    detail_url = reverse('news:detail', args=(news.pk,))
+    etag = client.get(detail_url)['ETag']
+    with django_assert_num_queries(0):
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    Comment.objects.create(news=news, author=author, text='Новый')
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_if_modified_since_does_not_hide_changes(client, author, news):
+    detail_url = reverse('news:detail', args=(news.pk,))
+    response = client.get(detail_url)
+    assert 'Last-Modified' not in response
+    Comment.objects.create(news=news, author=author, text='Новый')
+    response = client.get(
+        detail_url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_etag_differs_between_users(client, author_client, news_id):
+    detail_url = reverse('news:detail', args=news_id)
+    etag = client.get(detail_url)['ETag']
+    response = author_client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
@@ -0,0 +1,58 @@
+import json
+import time
+from http import HTTPStatus
+
+import pytest
+from django.template.response import SimpleTemplateResponse
+from django.urls import reverse
+
+from yanews.middleware import fingerprint
+
+
+def test_fingerprint_groups_queries_differing_by_params():
+    assert fingerprint(
+        "SELECT * FROM news_news WHERE id IN (1, 2, 3) AND title = 'a'"
+    ) == fingerprint(
+        "SELECT *\nFROM news_news WHERE id IN (%s, %s) AND title = 'b'"
+    )
+
+
+@pytest.mark.django_db
+def test_server_timing_header_and_log(
+        settings, client, count_comments_on_news, news_id, caplog
+):
+    settings.SERVER_TIMING_ENABLED = True
+    settings.SERVER_TIMING_SAMPLE_RATE = 1
+    with caplog.at_level('INFO', logger='yanews.middleware'):
+        response = client.get(reverse('news:detail', args=news_id))
+    header = response['Server-Timing']
+    for name in ('db', 'tpl', 'view', 'total'):
+        assert f'{name};dur=' in header
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record['status'] == HTTPStatus.OK
+    assert record['queries'] > 0
+    assert f'queries;desc="{record["queries"]}"' in header
+    assert record['tpl_ms'] > 0
+
+
+@pytest.mark.django_db
+def test_server_timing_counts_render_of_cached_page(
+        settings, client, news_id, monkeypatch
+):
+    settings.SERVER_TIMING_ENABLED = True
+    rendered_content = SimpleTemplateResponse.rendered_content
+
+    def slow_render(response):
+        time.sleep(0.05)
+        return rendered_content.fget(response)
+
+    monkeypatch.setattr(
+        SimpleTemplateResponse, 'rendered_content', property(slow_render)
+    )
+    response = client.get(reverse('news:detail', args=news_id))
+    timings = dict(
+        part.split(';dur=') for part in
+        response['Server-Timing'].split(', ')[:-1]
+    )
+    assert float(timings['tpl']) >= 50
+    assert float(timings['view']) < 50
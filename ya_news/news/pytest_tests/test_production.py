@@ -0,0 +1,32 @@
+import sqlite3
+
+import pytest
+from django.db.utils import ConnectionHandler
+
+from yanews import settings_prod
+
+
+def test_production_backend_applies_pragmas(tmp_path, django_db_blocker):
+    path = tmp_path / 'db.sqlite3'
+    connection = ConnectionHandler({'default': {
+        **settings_prod.DATABASES['default'], 'NAME': path,
+    }})['default']
+    with django_db_blocker.unblock():
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            assert cursor.fetchone() == ('wal',)
+            cursor.execute('PRAGMA busy_timeout')
+            assert cursor.fetchone() == (5000,)
+        # Транзакция сразу держит блокировку записи.
+        connection._start_transaction_under_autocommit()
+        other = sqlite3.connect(path, timeout=0)
+        with pytest.raises(sqlite3.OperationalError):
+            other.execute('BEGIN IMMEDIATE')
+        other.close()
+        connection.connection.rollback()
+        connection.close()
+
+
+def test_production_cache_is_shared_between_processes():
+    # Версии страниц в памяти процесса не видны другим воркерам.
+    assert 'locmem' not in settings_prod.CACHES['default']['BACKEND']
@@ -0,0 +1,211 @@
+import json
+import os
+import random
+import re
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news import seeding, urls
+from news.models import Comment, News, make_content_hash
+from yanews import settings_prod
+
+BASELINE_PATH = Path(__file__).with_name('query_baseline.json')
+# Маленький набор меньше одной страницы; большой строит seed, как
+# для бенчмарка: неравномерные ветки в тысячи комментариев.
+SMALL_DATASET = (3, 2)
+LARGE_DATASET = {
+    'users': 20, 'news': 5000, 'comments': 100_000, 'skew': 1.2
+}
+QUERY_PARAMS = {'news:search': {'q': 'погода'}}
+# Строка плана SQLite о просмотре таблицы без индекса.
+FULL_SCAN = re.compile(r'SCAN \w+')
+
+
+def clear():
+    Comment.objects.all().delete()
+    News.objects.all().delete()
+
+
+def seed_small(author):
+    """Несколько новостей с парой комментариев автора у каждой."""
+    news_count, comments_per_news = SMALL_DATASET
+    clear()
+    today = datetime.today()
+    news = []
+    for index in range(news_count):
+        item = News(
+            title=f'Погода {index}',
+            text='Завтра ожидается снег и ветер.',
+            date=today - timedelta(days=index),
+        )
+        item.content_hash = make_content_hash(item.title, item.date)
+        news.append(item)
+    News.objects.bulk_create(news)
+    news = list(News.objects.all())
+    Comment.objects.bulk_create([
+        Comment(news=item, author=author, text=f'Комментарий {index}')
+        for item in news
+        for index in range(comments_per_news)
+    ])
+    News.objects.recount_comments()
+    return news[0], Comment.objects.filter(news=news[0]).first()
+
+
+def seed_large(author):
+    """Данные seed; маршруты смотрят самую длинную ветку."""
+    clear()
+    seeding.seed(random.Random(0), **LARGE_DATASET)
+    news = News.objects.order_by('-comment_count').first()
+    comment = Comment.objects.create(
+        news=news, author=author, text='Комментарий автора'
+    )
+    return news, comment
+
+
+DATASETS = {'small': seed_small, 'large': seed_large}
+
+
+def route_args(name, news, comment):
+    """Аргументы маршрута: новость или комментарий по имени параметра."""
+    pattern = next(
+        pattern for pattern in urls.urlpatterns
+        if f'{urls.app_name}:{pattern.name}' == name
+    )
+    if 'pk' not in pattern.pattern.converters:
+        return ()
+    return (comment.pk,) if name in ('news:delete', 'news:edit') else (
+        news.pk,
+    )
+
+
+def capture_queries(client, url, params):
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params)
+        assert response.status_code < 400, url
+    return queries.captured_queries
+
+
+def plan_problems(queries):
+    """
+    Просмотры таблиц целиком и сортировки без индекса в планах запросов.
+
+    Сортировка найденного по рангу FTS без временного B-дерева
+    невозможна, поэтому для запросов с MATCH она допустима.
+    """
+    problems = []
+    with connection.cursor() as cursor:
+        for query in queries:
+            cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}')
+            for *_, detail in cursor.fetchall():
+                if FULL_SCAN.fullmatch(detail) or (
+                    'TEMP B-TREE' in detail and 'MATCH' not in query['sql']
+                ):
+                    problems.append(f'{detail}: {query["sql"]}')
+    return problems
+
+
+def measure(author):
+    """
+    Число запросов каждого маршрута для анонима и автора.
+
+    Вместе с числами возвращает плохие планы запросов на большом наборе.
+    """
+    clients = {'anonymous': Client(), 'author': Client()}
+    clients['author'].force_login(author)
+    names = [f'{urls.app_name}:{pattern.name}' for pattern in urls.urlpatterns]
+    counts = {name: {} for name in names}
+    problems = []
+    for dataset, seed in DATASETS.items():
+        news, comment = seed(author)
+        for name in names:
+            url = reverse(name, args=route_args(name, news, comment))
+            for role, client in clients.items():
+                queries = capture_queries(
+                    client, url, QUERY_PARAMS.get(name, {})
+                )
+                counts[name][f'{role}:{dataset}'] = len(queries)
+                if dataset == 'large':
+                    problems += [
+                        f'{name} {role}: {problem}'
+                        for problem in plan_problems(queries)
+                    ]
+    return counts, problems
+
+
+@pytest.mark.django_db
+def test_query_counts_do_not_grow(author):
+    """
+    Число запросов не растёт и не зависит от числа строк.
+
+    На большом наборе запросы к тому же не просматривают таблицы
+    целиком. Базовые значения хранятся в query_baseline.json; после намеренного
+    изменения их обновляет запуск с UPDATE_QUERY_BASELINE=1.
+    """
+    counts, errors = measure(author)
+    if os.environ.get('UPDATE_QUERY_BASELINE'):
+        BASELINE_PATH.write_text(
+            json.dumps(counts, indent=4, sort_keys=True) + '\n'
+        )
+    baseline = json.loads(BASELINE_PATH.read_text())
+    for name, route_counts in counts.items():
+        if name not in baseline:
+            errors.append(f'{name}: нет в базовом файле')
+            continue
+        for key, count in route_counts.items():
+            role = key.split(':')[0]
+            expected = baseline[name][key]
+            if count > expected:
+                errors.append(f'{name} {key}: {count} > {expected}')
+            scaling = count - route_counts[f'{role}:small']
+            expected_scaling = (
+                expected - baseline[name][f'{role}:small']
+            )
+            if scaling > expected_scaling:
+                errors.append(
+                    f'{name} {role}: растёт с числом строк на {scaling}'
+                )
+    assert not errors, '\n'.join(errors)
+
+
+@pytest.fixture
+def cached_auth(settings):
+    settings.SESSION_ENGINE = settings_prod.SESSION_ENGINE
+    settings.AUTHENTICATION_BACKENDS = settings_prod.AUTHENTICATION_BACKENDS
+
+
+@pytest.mark.django_db
+def test_cached_auth_skips_session_and_user_queries(
+        cached_auth, author, author_client, comment_id
+):
+    """Сессия и пользователь из кэша: в базу идут только запросы view."""
+    url = reverse('news:edit', args=comment_id)
+    author_client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        response = author_client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert not [
+        query['sql'] for query in queries
+        if 'django_session' in query['sql'] or 'auth_user' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+def test_password_change_ends_cached_session(
+        cached_auth, author, author_client, comment_id
+):
+    url = reverse('news:edit', args=comment_id)
+    author_client.get(url)
+    author.set_password('new-password')
+    author.save()
+    response = author_client.get(url)
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.url.startswith(reverse('users:login'))
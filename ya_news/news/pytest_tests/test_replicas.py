@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+from django.db.transaction import TransactionManagementError
+from django.http import HttpResponse
+
+from news.models import Comment, News
+from news.replicas import (
+    PIN_COOKIE, PrimaryPinMiddleware, ReplicaRouter, snapshot
+)
+
+
+def test_reads_go_to_replica_until_request_writes(settings, rf):
+    settings.DATABASE_REPLICAS = ['replica']
+    router = ReplicaRouter()
+    routes = []
+
+    def view(request):
+        routes.append(router.db_for_read(News))
+        if request.method == 'POST':
+            router.db_for_write(Comment)
+            routes.append(router.db_for_read(News))
+        return HttpResponse()
+
+    middleware = PrimaryPinMiddleware(view)
+    assert router.db_for_read(News) == 'default'
+    assert PIN_COOKIE not in middleware(rf.get('/')).cookies
+    response = middleware(rf.post('/'))
+    assert routes == ['replica', 'replica', 'default']
+    pinned = rf.get('/')
+    pinned.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+    middleware(pinned)
+    assert routes[-1] == 'default'
+    assert not router.allow_migrate('replica', 'news')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_snapshot_copies_database(tmp_path, news):
+    path = tmp_path / 'replica.sqlite3'
+    snapshot(path)
+    with sqlite3.connect(path) as replica:
+        assert replica.execute(
+            'SELECT title FROM news_news'
+        ).fetchall() == [(news.title,)]
+
+
+@pytest.mark.django_db
+def test_snapshot_refuses_to_run_inside_atomic(tmp_path):
+    with pytest.raises(TransactionManagementError):
+        snapshot(tmp_path / 'replica.sqlite3')
@@ -1,9 +1,13 @@
+from datetime import datetime
 from http import HTTPStatus
 
 import pytest
 from django.urls import reverse
+from django.utils.timezone import utc
 from pytest_django.asserts import assertRedirects
 
+from news.pagination import encode_cursor
+
 NEWS_EDIT_AND_DELETE = ('news:edit', 'news:delete')
 
 
@@ -20,7 +24,9 @@ NEWS_EDIT_AND_DELETE = ('news:edit', 'news:delete')
     'page, args',
     (
         ('news:home', None),
+        ('news:search', None),
         ('news:detail', pytest.lazy_fixture('news_id')),
+        ('news:comments', pytest.lazy_fixture('news_id')),
         ('users:login', None),
         ('users:logout', None),
         ('users:signup', None),
@@ -65,3 +71,15 @@ def test_availability_for_comment_edit_and_delete(
     url = reverse(page, args=comment_id)
     response = user.get(url)
     assert response.status_code == status
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'params',
+    ({}, {'after': encode_cursor((datetime(2020, 1, 1, tzinfo=utc), 1))})
+)
+def test_comments_of_missing_news_not_found(client, params):
+    url = reverse('news:comments', args=(1,))
+    for _ in range(2):
+        response = client.get(url, params)
+        assert response.status_code == HTTPStatus.NOT_FOUND
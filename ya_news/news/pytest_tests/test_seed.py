@@ -0,0 +1,39 @@
+import io
+from datetime import date
+
+import pytest
+from django.core.management import call_command
+
+from news.models import Comment, News, make_content_hash
+from news.search import search_news
+from news.seeding import LAST_DAY
+
+
+@pytest.mark.django_db
+def test_seed_is_deterministic_and_consistent():
+    def seed_and_dump():
+        call_command(
+            'seed', users=3, news=20, comments=200, stdout=io.StringIO()
+        )
+        return list(News.objects.order_by('pk').values_list(
+            'title', 'date', 'comment_count'
+        ))
+
+    first = seed_and_dump()
+    Comment.objects.all().delete()
+    News.objects.all().delete()
+    assert seed_and_dump() == first
+    assert sum(count for _, _, count in first) == Comment.objects.count()
+    news = News.objects.first()
+    assert news.content_hash == make_content_hash(news.title, news.date)
+    assert search_news(news.title.split()[0])[0]
+    assert max(day for _, day, _ in first) <= LAST_DAY
+
+
+@pytest.mark.django_db
+def test_seed_dates_end_on_last_day():
+    call_command(
+        'seed', '--last-day=2020-03-01', users=1, news=50, comments=0,
+        stdout=io.StringIO()
+    )
+    assert News.objects.first().date <= date(2020, 3, 1)
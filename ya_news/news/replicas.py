@@ -0,0 +1,127 @@
+"""
+Чтение с реплик базы.
+
+Реплики — копии основной базы, например снимки SQLite, которые
+обновляет команда snapshot_replicas; их псевдонимы перечислены
+в DATABASE_REPLICAS. Чтения в запросе идут на случайную реплику,
+запись — всегда в основную базу. Запрос, который что-то записал,
+и следующие запросы того же пользователя в течение
+REPLICA_PIN_SECONDS читают из основной базы: реплика ещё не знает
+о записи, а пользователь должен сразу видеть свой комментарий.
+"""
+import random
+import sqlite3
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'primary_db'
+
+# Состояние текущего запроса; вне запроса — None, и всё читается
+# из основной базы: командам и фоновым задачам отставание не нужно.
+request_state = ContextVar('replica_request_state', default=None)
+
+
+class RequestState:
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def reads_from_replica():
+    """Пойдёт ли чтение в текущем контексте на реплику."""
+    state = request_state.get()
+    return bool(
+        settings.DATABASE_REPLICAS
+        and state is not None
+        and not state.pinned
+        and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+    )
+
+
+@contextmanager
+def use_primary():
+    """Читать внутри блока из основной базы."""
+    state = request_state.get()
+    if state is None or state.pinned:
+        yield
+        return
+    state.pinned = True
+    try:
+        yield
+    finally:
+        state.pinned = state.wrote
+
+
+def snapshot(target_path, using=DEFAULT_DB_ALIAS):
+    """
+    Копирует базу SQLite в файл реплики через backup API.
+
+    Копия согласована: берётся внутри одной читающей транзакции,
+    пока писатели продолжают работать. Читатели реплики с открытыми
+    соединениями видят новые данные сразу после копирования.
+    Внутри atomic копировать нельзя: backup ждёт конца записи
+    в том же соединении и никогда его не дождётся.
+    """
+    source = connections[using]
+    source.validate_no_atomic_block()
+    source.ensure_connection()
+    target = sqlite3.connect(target_path)
+    try:
+        source.connection.backup(target)
+    finally:
+        target.close()
+
+
+class ReplicaRouter:
+    """Чтение с реплик, запись и миграции — только в основную базу."""
+
+    def db_for_read(self, model, **hints):
+        if reads_from_replica():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = request_state.get()
+        if state is not None:
+            state.wrote = state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class PrimaryPinMiddleware:
+    """
+    Привязывает к основной базе запросы после записи.
+
+    Если запрос что-то записал, ответ ставит cookie на
+    REPLICA_PIN_SECONDS; запросы с этой cookie читают из основной базы.
+    Без реплик middleware удаляет себя из цепочки.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RequestState(pinned=PIN_COOKIE in request.COOKIES)
+        token = request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_state.reset(token)
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax'
+            )
+        return response
@@ -0,0 +1,198 @@
+import re
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.db import connection, connections, models, router
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+from .models import News
+from .pagination import decode_cursor, encode_cursor, keyset_page
+
+CREATE_TABLE_SQL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS news_news_fts USING fts5(
+        title, text,
+        content='news_news', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+CREATE_TRIGGERS_SQL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS news_news_fts_insert
+    AFTER INSERT ON news_news BEGIN
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_news_fts_delete
+    AFTER DELETE ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_news_fts_update
+    AFTER UPDATE OF title, text ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+)
+# Совпадение в заголовке весит больше, чем в тексте.
+RANK_SQL = (
+    "INSERT INTO news_news_fts(news_news_fts, rank) "
+    "VALUES ('rank', 'bm25(10.0, 1.0)')"
+)
+
+INDEX_FROM_SQL = """
+    INSERT INTO news_news_fts(rowid, title, text)
+    SELECT id, title, text FROM news_news WHERE id >= %s
+"""
+
+SEARCH_SQL = """
+    SELECT n.id, n.date, news_news_fts.rank,
+        highlight(news_news_fts, 0, char(2), char(3)),
+        snippet(news_news_fts, 1, char(2), char(3), '…', 24)
+    FROM news_news_fts
+    JOIN news_news n ON n.id = news_news_fts.rowid
+    WHERE news_news_fts MATCH %s {conditions}
+    ORDER BY news_news_fts.rank, n.date DESC, n.id DESC
+    LIMIT %s
+"""
+AFTER_CURSOR_SQL = """
+    AND (news_news_fts.rank > %s OR news_news_fts.rank = %s AND (
+        n.date < %s OR n.date = %s AND n.id < %s
+    ))
+"""
+
+SearchHit = namedtuple('SearchHit', ('id', 'title', 'snippet', 'date'))
+
+
+def ensure_triggers(using='default', **kwargs):
+    """
+    Восстанавливает триггеры индекса, если их нет.
+
+    SQLite пересоздаёт таблицу news_news при добавлении полей, и триггеры
+    пропадают вместе со старой таблицей; поэтому проверка выполняется
+    после каждой миграции. Сам индекс создаёт и удаляет миграция.
+    """
+    if connections[using].vendor != 'sqlite':
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'news_news_fts'"
+        )
+        if cursor.fetchone() is None:
+            return
+        for sql in CREATE_TRIGGERS_SQL:
+            cursor.execute(sql)
+
+
+@contextmanager
+def deferred_indexing(first_id):
+    """
+    Индексирует новости с id от first_id одним запросом после вставки.
+
+    Для массовой вставки это в разы быстрее, чем триггер на каждую
+    строку; на время вставки триггер снимается.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('DROP TRIGGER IF EXISTS news_news_fts_insert')
+    try:
+        yield
+    finally:
+        ensure_triggers()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'news_news_fts'"
+            )
+            if cursor.fetchone() is not None:
+                cursor.execute(INDEX_FROM_SQL, (first_id,))
+
+
+def highlight(text):
+    """Экранирует текст и превращает маркеры FTS5 в теги <mark>."""
+    return mark_safe(
+        escape(text).replace('\x02', '<mark>').replace('\x03', '</mark>')
+    )
+
+
+# Поля ключа сортировки поиска: релевантность, дата и id новости.
+CURSOR_FIELDS = (
+    models.FloatField(), News._meta.get_field('date'), News._meta.pk
+)
+
+
+def build_match(query):
+    """
+    Превращает пользовательский запрос в выражение MATCH.
+
+    Слова выделяются так же, как в поиске заметок, и каждое берётся
+    в кавычки, так что синтаксис FTS5 в запросе не работает. Знаки
+    препинания словами не считаются: «снег,» ищет то же, что «снег».
+    """
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', query))
+
+
+def search_news(query, date_from=None, date_to=None, cursor=None, size=20):
+    """
+    Поиск новостей по словам и диапазону дат.
+
+    Найденное сортируется по релевантности, при равной релевантности —
+    как на главной, от новых к старым. Страницы листаются курсором,
+    поэтому стоимость страницы не зависит от её номера.
+    """
+    match = build_match(query)
+    if not match:
+        return filter_by_date(date_from, date_to, cursor, size)
+    conditions, params = [], [match]
+    if date_from:
+        conditions.append('AND n.date >= %s')
+        params.append(date_from.isoformat())
+    if date_to:
+        conditions.append('AND n.date <= %s')
+        params.append(date_to.isoformat())
+    if cursor:
+        rank, last_date, last_id = decode_cursor(cursor, CURSOR_FIELDS)
+        last_date = last_date.isoformat()
+        conditions.append(AFTER_CURSOR_SQL)
+        params += [rank, rank, last_date, last_date, last_id]
+    sql = SEARCH_SQL.format(conditions=' '.join(conditions))
+    with connections[router.db_for_read(News)].cursor() as db_cursor:
+        db_cursor.execute(sql, params + [size + 1])
+        rows = db_cursor.fetchall()
+    hits = [
+        SearchHit(pk, highlight(title), highlight(snippet), news_date)
+        for pk, news_date, rank, title, snippet in rows[:size]
+    ]
+    next_cursor = None
+    if len(rows) > size:
+        pk, news_date, rank, *_ = rows[size - 1]
+        next_cursor = encode_cursor([rank, news_date, pk])
+    return hits, next_cursor
+
+
+def filter_by_date(date_from, date_to, cursor, size):
+    """Новости за период без поиска по словам, по индексу (date, id)."""
+    queryset = News.objects.values('id', 'title', 'text', 'date')
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    items, next_cursor = keyset_page(queryset, ('-date', '-id'), cursor, size)
+    hits = [
+        SearchHit(
+            item['id'], escape(item['title']),
+            escape(Truncator(item['text']).words(24, truncate=' …')),
+            item['date']
+        )
+        for item in items
+    ]
+    return hits, next_cursor
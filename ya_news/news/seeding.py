@@ -0,0 +1,224 @@
+"""
+Быстрое заполнение базы синтетическими данными для профилирования.
+
+Строки вставляются через executemany большими транзакциями, мимо
+моделей: без save(), сигналов и без ограничения SQLite в 999 параметров
+на запрос, из-за которого bulk_create режет вставку на пачки по сотне
+строк. Поэтому значения сразу готовятся в том виде, в каком их хранит
+база, а денормализованные поля — comment_count и content_hash —
+считаются здесь же.
+"""
+from datetime import date, timedelta
+from contextlib import contextmanager
+from itertools import islice, repeat
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Max
+
+from .cache import bump_home
+from .models import Comment, News, make_content_hash, make_excerpt
+from .search import deferred_indexing
+
+BATCH_SIZE = 100_000
+TEXTS_IN_POOL = 1000
+DAYS_BACK = 3650
+# Последний день, на который выпадают даты новостей. Дата не зависит
+# от дня запуска, чтобы один --seed давал одни и те же данные.
+LAST_DAY = date(2026, 1, 1)
+MINUTES_IN_DAY = 24 * 60
+CLOCK = tuple(
+    f'{minute // 60:02}:{minute % 60:02}:00'
+    for minute in range(MINUTES_IN_DAY)
+)
+VOCABULARY = (
+    'город', 'погода', 'снег', 'ветер', 'дождь', 'выборы', 'спорт',
+    'футбол', 'матч', 'школа', 'театр', 'музей', 'выставка', 'концерт',
+    'дорога', 'мост', 'метро', 'автобус', 'парк', 'река', 'завод',
+    'рынок', 'цены', 'налог', 'закон', 'суд', 'больница', 'врач',
+    'учёные', 'открытие', 'праздник', 'жители', 'мэр', 'губернатор',
+    'новый', 'старый', 'большой', 'вчера', 'сегодня', 'завтра',
+)
+
+
+def make_texts(rng, count, words):
+    """Пул случайных фраз: выбрать готовую дешевле, чем собрать новую."""
+    return [
+        ' '.join(rng.choices(VOCABULARY, k=words)).capitalize()
+        for _ in range(count)
+    ]
+
+
+def next_id(model):
+    return (model.objects.aggregate(Max('pk'))['pk__max'] or 0) + 1
+
+
+def insert_rows(model, fields, rows, batch_size=BATCH_SIZE):
+    """Вставляет кортежи значений полей fields, возвращает число строк."""
+    quote = connection.ops.quote_name
+    meta = model._meta
+    columns = ', '.join(
+        quote(meta.get_field(field).column) for field in fields
+    )
+    placeholders = ', '.join(['%s'] * len(fields))
+    sql = (
+        f'INSERT INTO {quote(meta.db_table)} ({columns}) '
+        f'VALUES ({placeholders})'
+    )
+    total = 0
+    rows = iter(rows)
+    with connection.cursor() as cursor:
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                return total
+            with transaction.atomic():
+                cursor.executemany(sql, chunk)
+            total += len(chunk)
+
+
+@contextmanager
+def foreign_key_checks_disabled():
+    """
+    Выключает проверку внешних ключей SQLite на время вставки.
+
+    Строки согласованы по построению, а проверка стоит около 10%
+    времени загрузки. PRAGMA foreign_keys внутри транзакции ничего
+    не меняет, поэтому под atomic, например в тестах, проверка
+    остаётся включённой.
+    """
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        yield
+        return
+    with connection.constraint_checks_disabled():
+        yield
+
+
+@contextmanager
+def deferred_indexes(model, rows):
+    """
+    Снимает вторичные индексы таблицы на время вставки и строит заново.
+
+    Построить индекс по готовой таблице быстрее, чем обновлять его
+    на каждой строке, — если вставляется больше строк, чем уже есть.
+    Уникальные ограничения остаются: их индексы создаёт сама таблица.
+    """
+    if connection.vendor != 'sqlite' or rows <= model.objects.count():
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name = %s AND sql IS NOT NULL",
+            (model._meta.db_table,)
+        )
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in indexes:
+                cursor.execute(sql)
+
+
+def distribute(rng, total, parts, skew):
+    """
+    Раскладывает total по parts долям с тяжёлым хвостом.
+
+    Доли пропорциональны значениям распределения Парето с параметром
+    skew: чем он меньше, тем длиннее самые обсуждаемые ветки.
+    """
+    if not parts:
+        return []
+    weights = [rng.paretovariate(skew) for _ in range(parts)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for index in rng.sample(range(parts), total - sum(counts)):
+        counts[index] += 1
+    return counts
+
+
+def seed_users(count):
+    """Пользователи с неиспользуемым паролем: хеширование слишком дорого."""
+    User = get_user_model()
+    first = next_id(User)
+    password = make_password(None)
+    User.objects.bulk_create([
+        User(pk=pk, username=f'seed-{pk}', password=password)
+        for pk in range(first, first + count)
+    ], batch_size=BATCH_SIZE)
+    return list(range(first, first + count))
+
+
+def seed_news(rng, count, comment_counts, last_day=LAST_DAY):
+    """Новости с датами за DAYS_BACK дней до last_day, пары (id, дата)."""
+    first = next_id(News)
+    titles = make_texts(rng, TEXTS_IN_POOL, 3)
+    texts = [
+        (text, make_excerpt(text))
+        for text in make_texts(rng, TEXTS_IN_POOL, 40)
+    ]
+    news = [
+        (pk, last_day - timedelta(days=rng.randrange(DAYS_BACK)))
+        for pk in range(first, first + count)
+    ]
+
+    def rows():
+        for (pk, day), comment_count in zip(news, comment_counts):
+            title = rng.choice(titles)
+            text, excerpt = rng.choice(texts)
+            yield (
+                pk, title, text, excerpt, day.isoformat(),
+                comment_count, make_content_hash(title, day),
+            )
+
+    insert_rows(News, (
+        'id', 'title', 'text', 'excerpt', 'date', 'comment_count',
+        'content_hash',
+    ), rows())
+    return news
+
+
+def timestamps(day, count):
+    """Время в формате базы с шагом в минуту от полуночи дня day."""
+    for offset in range(0, count, MINUTES_IN_DAY):
+        prefix = f'{day + timedelta(days=offset // MINUTES_IN_DAY)} '
+        yield from map(
+            prefix.__add__, CLOCK[:min(count - offset, MINUTES_IN_DAY)]
+        )
+
+
+def seed_comments(rng, news, comment_counts, user_ids):
+    """Комментарии веток подряд, по минуте между соседними."""
+    texts = make_texts(rng, TEXTS_IN_POOL, 12)
+
+    def rows():
+        for (pk, day), count in zip(news, comment_counts):
+            yield from zip(
+                repeat(pk, count),
+                rng.choices(user_ids, k=count),
+                rng.choices(texts, k=count),
+                timestamps(day, count),
+                repeat(Comment.Status.PUBLISHED.value, count),
+                repeat('', count),
+            )
+
+    return insert_rows(Comment, (
+        'news', 'author', 'text', 'created', 'status', 'flagged_words'
+    ), rows())
+
+
+def seed(rng, users, news, comments, skew, last_day=LAST_DAY):
+    """Создаёт пользователей, новости и комментарии; возвращает их число."""
+    user_ids = seed_users(users)
+    comment_counts = distribute(rng, comments, news, skew)
+    with foreign_key_checks_disabled():
+        with deferred_indexing(next_id(News)), deferred_indexes(News, news):
+            created_news = seed_news(rng, news, comment_counts, last_day)
+        with deferred_indexes(Comment, comments):
+            seed_comments(rng, created_news, comment_counts, user_ids)
+    bump_home()
+    return {'users': users, 'news': news, 'comments': comments}
@@ -0,0 +1,111 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_home, bump_news
+from .events import publish_comment
+from .forms import profanity_filter
+from .models import BadWord, Comment, News
+from .profanity import bad_words_changed
+
+
+def change_comment_count(news_id, delta):
+    News.objects.filter(pk=news_id).update(
+        comment_count=Greatest(F('comment_count') + delta, 0)
+    )
+
+
+def announce_comment(comment):
+    """После фиксации рассылает комментарий читателям новости."""
+    transaction.on_commit(partial(publish_comment, comment.news_id, {
+        'id': comment.pk,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created,
+    }))
+
+
+@receiver(pre_save, sender=Comment)
+def load_published_in_db(sender, instance, **kwargs):
+    """
+    Дочитывает статус в базе, если комментарий загружен без него.
+
+    Иначе опубликованный комментарий после only()/defer() считался бы
+    новым опубликованным и счётчик новости рос бы при каждом сохранении.
+    """
+    if instance._state.adding or getattr(
+        instance, 'published_in_db', None
+    ) is not None:
+        return
+    instance.published_in_db = Comment.objects.filter(
+        pk=instance.pk, status=Comment.Status.PUBLISHED
+    ).exists()
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_count(sender, instance, created, **kwargs):
+    """
+    Счётчик у новости считает только опубликованные комментарии.
+
+    Он растёт, когда комментарий публикуется, и уменьшается, когда
+    опубликованный уходит на повторную модерацию. Опубликованный
+    комментарий рассылается читателям новости.
+    """
+    was_published = not created and getattr(
+        instance, 'published_in_db', False
+    )
+    published = instance.status == Comment.Status.PUBLISHED
+    instance.published_in_db = published
+    if published != was_published:
+        change_comment_count(instance.news_id, 1 if published else -1)
+        if published:
+            announce_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def decrease_comment_count(sender, instance, **kwargs):
+    """Удалённый опубликованный комментарий уменьшает счётчик."""
+    if instance.status == Comment.Status.PUBLISHED:
+        change_comment_count(instance.news_id, -1)
+
+
+def reset_now_and_on_commit(reset):
+    """
+    Сбрасывает версии сразу и ещё раз после фиксации транзакции.
+
+    Страница, отрендеренная по старым данным до фиксации,
+    не переживёт второго сброса.
+    """
+    reset()
+    transaction.on_commit(reset)
+
+
+def reset_news_and_home(news_id):
+    bump_news(news_id)
+    bump_home()
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def reset_news_pages(sender, instance, **kwargs):
+    """Изменение новости сбрасывает её страницу и главную."""
+    reset_now_and_on_commit(partial(reset_news_and_home, instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def reset_comment_pages(sender, instance, **kwargs):
+    """Изменение комментария сбрасывает только страницы его новости."""
+    reset_now_and_on_commit(partial(bump_news, instance.news_id))
+
+
+@receiver(post_save, sender=BadWord)
+@receiver(post_delete, sender=BadWord)
+def reload_bad_words(sender, **kwargs):
+    """Изменение списка слов пересобирает автомат во всех процессах."""
+    bad_words_changed()
+    profanity_filter.invalidate()
@@ -1,16 +1,33 @@
 from django.urls import path
 
-from news import views
+from news import api, views
 
 app_name = 'news'
 
 urlpatterns = [
     path('', views.NewsList.as_view(), name='home'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
     path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsCommentsMore.as_view(),
+        name='comments'
+    ),
+    path(
+        'news/<int:pk>/events/',
+        views.NewsEventsFallback.as_view(),
+        name='events'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path('api/news/', api.NewsListApi.as_view(), name='api_news'),
+    path(
+        'api/news/<int:pk>/comments/',
+        api.CommentsListApi.as_view(),
+        name='api_comments'
+    ),
 ]
@@ -1,39 +1,140 @@
+import re
+from http import HTTPStatus
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import transaction
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.safestring import mark_safe
 from django.views import generic
 
-from .forms import CommentForm
+from .cache import (
+    HOME_VERSION_KEY, AnonymousPageCacheMixin, cached_fragment,
+    comments_fragment_key, get_version, news_version_key, page_validators,
+    remember_home_page
+)
+from .forms import CommentForm, NewsSearchForm
 from .models import Comment, News
+from .pagination import keyset_page
+from .ratelimit import RateLimitMixin
+from .replicas import use_primary
+from .search import search_news
+
+COMMENTS_ORDERING = ('created', 'id')
+# Метка на месте ссылок «Редактировать» и «Удалить»: id комментария
+# и автора. Подделать её в тексте нельзя — «<» там экранируется.
+COMMENT_ACTIONS = re.compile(r'<!--actions:(\d+):(\d+)-->')
+
+
+def get_comments_page(news_id, cursor=None):
+    """Страница ветки комментариев новости в порядке публикации."""
+    return keyset_page(
+        Comment.objects.filter(
+            news_id=news_id, status=Comment.Status.PUBLISHED
+        ).select_related('author'),
+        COMMENTS_ORDERING,
+        cursor,
+        settings.COMMENTS_COUNT_ON_PAGE,
+    )
+
+
+def render_comments(request, news_id, cursor=None, check_news=True):
+    """
+    HTML страницы ветки комментариев.
+
+    Ветка одинакова для всех и кэшируется по версии новости и курсору:
+    добавление, правка и удаление комментария меняют версию. Ссылки
+    на правку и удаление подставляются после, только в комментарии
+    текущего пользователя. Для несуществующей новости — Http404, и
+    в кэш ничего не попадает; check_news=False, если новость уже
+    загружена.
+    """
+
+    def render():
+        # Отстающая реплика сохранила бы под новой версией старую ветку.
+        with use_primary():
+            comments, next_cursor = get_comments_page(news_id, cursor)
+            # Есть ли новость, проверяется, только когда комментариев нет.
+            if check_news and not comments and not News.objects.filter(
+                pk=news_id
+            ).exists():
+                raise Http404('Новость не найдена.')
+            return render_to_string('news/includes/comments.html', {
+                'news_id': news_id,
+                'comments': comments,
+                'next_cursor': next_cursor,
+            }).strip()
+
+    html = cached_fragment(
+        comments_fragment_key(news_id, cursor), render,
+        settings.NEWS_COMMENTS_CACHE_TIMEOUT
+    )
+    user_id = str(request.user.pk)
+
+    def actions(match):
+        comment_id, author_id = match.groups()
+        if author_id != user_id:
+            return ''
+        return render_to_string(
+            'news/includes/comment_actions.html', {'comment_id': comment_id}
+        )
 
+    return mark_safe(COMMENT_ACTIONS.sub(actions, html))
 
-class NewsList(generic.ListView):
+
+@page_validators(lambda: HOME_VERSION_KEY)
+class NewsList(AnonymousPageCacheMixin, generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
 
+    def get_page_version(self):
+        return get_version(HOME_VERSION_KEY)
+
     def get_queryset(self):
         """
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
+        Число комментариев берётся из счётчика, сами комментарии
+        не загружаются; вместо полного текста — готовое начало.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.defer('text')[
+            :settings.NEWS_COUNT_ON_HOME_PAGE
+        ]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        remember_home_page(news.pk for news in context['object_list'])
+        return context
+
+
+class CommentsPageMixin:
+    """Добавляет в контекст HTML первой страницы комментариев новости."""
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments_html'] = render_comments(
+            self.request, self.object.pk, check_news=False
+        )
+        return context
 
 
-class NewsDetail(generic.DetailView):
+@page_validators(lambda pk: news_version_key(pk))
+class NewsDetail(
+        AnonymousPageCacheMixin, CommentsPageMixin, generic.DetailView
+):
     model = News
     template_name = 'news/detail.html'
 
+    def get_page_version(self):
+        return get_version(news_version_key(self.kwargs['pk']))
+
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -42,8 +143,55 @@ class NewsDetail(generic.DetailView):
         return context
 
 
+class NewsCommentsMore(generic.View):
+    """Следующая страница комментариев в виде HTML-фрагмента."""
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(render_comments(
+            request, self.kwargs['pk'], request.GET.get('after')
+        ))
+
+
+class NewsEventsFallback(generic.View):
+    """
+    Поток новых комментариев без ASGI.
+
+    Под ASGI этот адрес перехватывает news.events.CommentEvents
+    и до Django запрос не доходит. Без него поток недоступен:
+    ответ 204 велит EventSource больше не переподключаться.
+    """
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
+
+
+class NewsSearch(generic.TemplateView):
+    """Поиск новостей по словам и датам."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        form = NewsSearchForm(self.request.GET or None)
+        context['form'] = form
+        if not form.is_valid():
+            return context
+        context['results'], next_cursor = search_news(
+            form.cleaned_data['q'],
+            form.cleaned_data['date_from'],
+            form.cleaned_data['date_to'],
+            self.request.GET.get('after'),
+            settings.NEWS_COUNT_ON_SEARCH_PAGE,
+        )
+        if next_cursor:
+            params = self.request.GET.copy()
+            params['after'] = next_cursor
+            context['next_page'] = params.urlencode()
+        return context
+
+
 class NewsComment(
         LoginRequiredMixin,
+        CommentsPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -59,7 +207,8 @@ class NewsComment(
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        with transaction.atomic():
+            comment.save()
         return super().form_valid(form)
 
     def get_success_url(self):
@@ -67,7 +216,8 @@ class NewsComment(
         return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
 
 
-class NewsDetailView(generic.View):
+class NewsDetailView(RateLimitMixin, generic.View):
+    rate_limit_scope = 'comment'
 
     def get(self, request, *args, **kwargs):
         view = NewsDetail.as_view()
@@ -102,3 +252,7 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    @transaction.atomic
+    def delete(self, request, *args, **kwargs):
+        return super().delete(request, *args, **kwargs)
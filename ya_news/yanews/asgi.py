@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Поток новых комментариев news:events обслуживается мимо Django.
+from news.events import CommentEvents  # noqa: E402
+
+application = CommentEvents(django_application)
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,11 +22,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanews.middleware.ServerTimingMiddleware',
+    'news.replicas.PrimaryPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'news.ratelimit.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -51,10 +55,16 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('YANEWS_DATABASE', BASE_DIR / 'db.sqlite3'),
     }
 }
 
@@ -80,3 +90,72 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_PAGE = 20
+
+NEWS_COUNT_ON_SEARCH_PAGE = 20
+
+NEWS_API_PAGE_SIZE = 50
+
+# Файл с дополнительными запрещёнными словами, по одному в строке.
+BAD_WORDS_FILE = None
+
+# Время жизни кэша страниц для анонимных пользователей, 0 — без кэша.
+NEWS_PAGE_CACHE_TIMEOUT = 60 * 5
+# Проверять комментарии не в запросе, а командой moderate_comments:
+# до проверки комментарий ждёт модерации и никому не виден.
+COMMENT_MODERATION_ASYNC = False
+# Сколько комментариев очереди модерации проверяется за один проход.
+COMMENT_MODERATION_BATCH_SIZE = 100
+
+# Время жизни HTML ветки комментариев, общего для всех пользователей;
+# 0 — без кэша.
+NEWS_COMMENTS_CACHE_TIMEOUT = 60 * 60
+# То же для JSON страниц API; 0 — без кэша.
+NEWS_API_CACHE_TIMEOUT = 60 * 60
+
+# Ограничения частоты: имя → (запросов, за секунд) на пользователя
+# и на IP. writes — на все изменяющие запросы, comment — на отправку
+# комментариев.
+RATE_LIMITS = {
+    'writes': (120, 60),
+    'comment': (10, 60),
+}
+
+DATABASE_ROUTERS = ['news.replicas.ReplicaRouter']
+# Псевдонимы баз из DATABASES, с которых читают запросы; пусто — без реплик.
+DATABASE_REPLICAS = []
+# Сколько секунд после записи пользователь читает из основной базы;
+# должно быть больше периода обновления реплик.
+REPLICA_PIN_SECONDS = 15
+
+# Новые комментарии через Server-Sent Events (news/events.py):
+# брокер подписок, очередь событий подписчика и период пустых
+# сообщений, которые держат тихое соединение открытым, в секундах.
+NEWS_EVENTS_BROKER = 'news.events.LocalBroker'
+NEWS_EVENTS_QUEUE_SIZE = 100
+NEWS_EVENTS_KEEPALIVE = 15
+
+# Сколько секунд пользователь запроса живёт в кэше
+# (см. AUTHENTICATION_BACKENDS в settings_prod).
+USER_CACHE_TIMEOUT = 60 * 60
+
+# Заголовок Server-Timing и JSON-лог времени запросов.
+SERVER_TIMING_ENABLED = False
+# Доля запросов, попадающих в лог; запросы с медленным SQL пишутся всегда.
+SERVER_TIMING_SAMPLE_RATE = 0.01
+SERVER_TIMING_SLOW_QUERY_MS = 100
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yanews.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
@@ -0,0 +1,51 @@
+"""
+Пользователь запроса из кэша.
+
+Каждый запрос с сессией читает пользователя из auth_user.
+CachedModelBackend берёт его из кэша; запись сбрасывается при
+сохранении и удалении пользователя, в том числе при смене пароля,
+поэтому проверка хэша сессии сразу видит новый пароль. Изменения
+через queryset.update() мимо сигналов доходят до кэша только
+по истечении USER_CACHE_TIMEOUT.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+User = get_user_model()
+
+
+def user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user(sender, instance, **kwargs):
+    """
+    Сбрасывает пользователя сразу и после фиксации транзакции.
+
+    Второй сброс нужен, если до фиксации параллельный запрос
+    успел положить в кэш старую строку.
+    """
+    key = user_key(instance.pk)
+    cache.delete(key)
+    transaction.on_commit(partial(cache.delete, key))
@@ -0,0 +1,197 @@
+import importlib
+import multiprocessing
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import Paginator
+from django.db import connections
+from django.middleware.csrf import get_token
+from django.test import Client, RequestFactory, override_settings
+
+from .models import Note
+from .pagination import encode_cursor, keyset_page
+from .ratelimit import hit
+from .views import NOTES_ORDERINGS
+
+WSGI_APPLICATION = 'yanote.wsgi'
+HOST = 'localhost'
+# Где в списке открывается страница: доля от числа заметок автора.
+PAGE_POSITIONS = (0, 0.1, 0.5, 0.99)
+
+
+def summarize(timings, errors, elapsed):
+    """p50/p99 в миллисекундах и число запросов в секунду."""
+    timings = sorted(timings)
+    count = len(timings)
+    return {
+        'requests': count,
+        'errors': errors,
+        'p50_ms': round(timings[count // 2] * 1000, 3) if count else None,
+        'p99_ms': (
+            round(timings[max(int(count * 0.99) - 1, 0)] * 1000, 3)
+            if count else None
+        ),
+        'rps': round(count / elapsed, 1) if elapsed else None,
+    }
+
+
+def login_cookies(user):
+    """Cookie сессии и CSRF-токен для запросов мимо тестового клиента."""
+    client = Client(HTTP_HOST=HOST)
+    client.force_login(user)
+    request = RequestFactory().get('/')
+    token = get_token(request)
+    cookies = {
+        'sessionid': client.cookies['sessionid'].value,
+        'csrftoken': request.META['CSRF_COOKIE'],
+    }
+    return cookies, token
+
+
+def fill(data, number):
+    """Данные формы: в значения подставляется номер запроса."""
+    return {key: value.format(number) for key, value in data.items()}
+
+
+def run_client(user, method, url, data, count):
+    """Гоняет запросы через тестовый клиент Django в текущем процессе."""
+    client = Client(HTTP_HOST=HOST)
+    if user is not None:
+        client.force_login(user)
+    send = getattr(client, method)
+    timings, errors = [], 0
+    started = time.perf_counter()
+    for number in range(count):
+        start = time.perf_counter()
+        response = send(url, fill(data, number) if data else None)
+        timings.append(time.perf_counter() - start)
+        errors += response.status_code >= 400
+    return summarize(timings, errors, time.perf_counter() - started)
+
+
+def make_environ(method, url, body, cookies):
+    """WSGI-окружение запроса, собранное открытым API RequestFactory."""
+    return RequestFactory().generic(
+        method.upper(), url, body,
+        content_type='application/x-www-form-urlencoded',
+        HTTP_HOST=HOST,
+        HTTP_COOKIE='; '.join(f'{k}={v}' for k, v in cookies.items()),
+    ).environ
+
+
+def wsgi_worker(args):
+    """Один процесс нагрузки: последовательные запросы к WSGI-приложению."""
+    worker, method, url, data, count, cookies, token = args
+    application = importlib.import_module(WSGI_APPLICATION).application
+    timings, errors = [], 0
+
+    def start_response(status, headers, exc_info=None):
+        nonlocal errors
+        errors += int(status.split()[0]) >= 400
+
+    for number in range(count):
+        body = b''
+        if data:
+            body = urlencode({
+                **fill(data, worker * count + number),
+                'csrfmiddlewaretoken': token,
+            }).encode()
+        environ = make_environ(method, url, body, cookies)
+        start = time.perf_counter()
+        try:
+            result = application(environ, start_response)
+            for _ in result:
+                pass
+            result.close()
+        except Exception:
+            errors += 1
+        timings.append(time.perf_counter() - start)
+    return timings, errors
+
+
+def run_wsgi(user, method, url, data, count, workers):
+    """
+    Гоняет запросы через WSGI-приложение из нескольких процессов.
+
+    Процессы порождаются fork-ом после закрытия соединений с базой,
+    каждый открывает своё. Запросы идут по кругу без пауз: rps —
+    пропускная способность при workers одновременных клиентах.
+    """
+    cookies, token = login_cookies(user) if user else ({}, '')
+    connections.close_all()
+    per_worker = max(count // workers, 1)
+    context = multiprocessing.get_context('fork')
+    started = time.perf_counter()
+    with context.Pool(workers) as pool:
+        results = pool.map(wsgi_worker, [
+            (worker, method, url, data, per_worker, cookies, token)
+            for worker in range(workers)
+        ])
+    elapsed = time.perf_counter() - started
+    timings = [timing for worker_timings, _ in results
+               for timing in worker_timings]
+    return summarize(timings, sum(errors for _, errors in results), elapsed)
+
+
+def run_rate_limit(count):
+    """Сколько микросекунд добавляет к запросу проверка частоты."""
+    request = RequestFactory().post('/')
+    request.user = AnonymousUser()
+    with override_settings(RATE_LIMITS={'benchmark': (count + 1, 60)}):
+        start = time.perf_counter()
+        for _ in range(count):
+            hit('benchmark', request)
+        elapsed = time.perf_counter() - start
+    return {
+        'requests': count,
+        'us_per_request': round(elapsed / count * 10 ** 6, 2),
+    }
+
+
+def cursor_at(notes, ordering, offset):
+    """Курсор страницы, которая начинается после offset заметок."""
+    if not offset:
+        return None
+    fields = [field.lstrip('-') for field in ordering]
+    return encode_cursor(
+        notes.order_by(*ordering).values_list(*fields)[offset - 1]
+    )
+
+
+def run_repeated(load, count):
+    """Вызывает load count раз подряд и сводит время вызовов."""
+    timings = []
+    started = time.perf_counter()
+    for _ in range(count):
+        start = time.perf_counter()
+        load()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings, 0, time.perf_counter() - started)
+
+
+def run_page_positions(user, count):
+    """
+    Страница списка заметок в начале, середине и конце: курсор и OFFSET.
+
+    Курсор — то, что отдаёт список заметок; OFFSET — страница
+    Paginator с тем же порядком, для сравнения. Отдаёт по записи
+    на каждый порядок, место в списке и способ.
+    """
+    notes = Note.objects.filter(author=user).only('id', 'slug', 'title')
+    total = notes.count()
+    size = settings.NOTES_COUNT_ON_PAGE
+    for sort, ordering in NOTES_ORDERINGS.items():
+        paginator = Paginator(notes.order_by(*ordering), size)
+        for position in PAGE_POSITIONS:
+            offset = int(total * position)
+            cursor = cursor_at(notes, ordering, offset)
+            page = offset // size + 1
+            where = {'sort': sort, 'position': position, 'offset': offset}
+            yield 'keyset', where, run_repeated(
+                lambda: keyset_page(notes, ordering, cursor, size), count
+            )
+            yield 'offset', where, run_repeated(
+                lambda: list(paginator.get_page(page).object_list), count
+            )
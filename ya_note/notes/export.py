@@ -0,0 +1,53 @@
+import csv
+import json
+
+from .models import Note
+
+EXPORT_FIELDS = ('id', 'title', 'slug', 'text')
+CHUNK_SIZE = 500
+
+
+def iter_notes(author_id):
+    """
+    Заметки автора по возрастанию id.
+
+    Каждый кусок читается отдельным коротким запросом по индексу
+    (author_id, id): медленный клиент не держит открытым ни курсор,
+    ни транзакцию, а в памяти не больше одного куска.
+    """
+    last_id = 0
+    while True:
+        rows = list(
+            Note.objects.filter(author_id=author_id, id__gt=last_id)
+            .order_by('id').values_list(*EXPORT_FIELDS)[:CHUNK_SIZE]
+        )
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1][0]
+
+
+def render_jsonl(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False)
+        yield '\n'
+
+
+class Echo:
+    """Псевдофайл для csv.writer: строка сразу отдаётся наружу."""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+FORMATS = {
+    'jsonl': (render_jsonl, 'application/x-ndjson; charset=utf-8'),
+    'csv': (render_csv, 'text/csv; charset=utf-8'),
+}
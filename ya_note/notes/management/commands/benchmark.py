@@ -0,0 +1,118 @@
+import json
+import platform
+import random
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import reverse
+
+from notes.benchmark import (
+    run_client, run_page_positions, run_rate_limit, run_wsgi
+)
+from notes.models import Note
+from notes.seeding import seed
+
+# Слово из словаря notes.seeding: оно есть в большой доле заметок,
+# так что поиск отдаёт полную страницу и честно считает совпадения.
+SEARCH_QUERY = 'молоко'
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет p50/p99 и запросы в секунду для списка заметок, поиска, '
+        'создания и редактирования заметки — через тестовый клиент и через '
+        'WSGI-приложение из нескольких процессов, а также страницу списка '
+        'в начале, середине и конце: курсор против OFFSET. Пишет данные '
+        'в текущую базу, запускайте на отдельной копии.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notes', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Процессов нагрузки на WSGI-приложение, 0 — не запускать.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output', help='Куда записать JSON, по умолчанию stdout.'
+        )
+
+    # Ограничитель частоты отверг бы большую часть нагрузки;
+    # его собственная цена замеряется отдельно.
+    @override_settings(RATE_LIMITS={})
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING(
+                'DEBUG включён: результаты будут хуже, чем в бою.'
+            ))
+        self.seed(options)
+        note = Note.objects.select_related('author').first()
+        user = note.author
+        scenarios = (
+            ('note-list', 'get', reverse('notes:list'), None),
+            ('note-search', 'get', '{}?{}'.format(
+                reverse('notes:search'), urlencode({'q': SEARCH_QUERY})
+            ), None),
+            ('note-create', 'post', reverse('notes:add'),
+             {'title': 'Заметка {}', 'text': 'Текст заметки {}.'}),
+            ('note-edit', 'post', reverse('notes:edit', args=(note.slug,)),
+             {'title': 'Правка {}', 'text': 'Новый текст {}.',
+              'slug': note.slug}),
+        )
+        results = []
+        for name, method, url, data in scenarios:
+            results.append(self.report(name, 'client', run_client(
+                user, method, url, data, options['requests']
+            )))
+            if options['workers']:
+                results.append(self.report(name, 'wsgi', run_wsgi(
+                    user, method, url, data,
+                    options['requests'], options['workers']
+                )))
+        for driver, where, result in run_page_positions(
+            user, options['requests']
+        ):
+            results.append(self.report(
+                'note-list-page', driver, {**where, **result}
+            ))
+        results.append(self.report('rate-limit-check', 'cache', (
+            run_rate_limit(options['requests'])
+        )))
+        report = json.dumps({
+            'project': 'ya_note',
+            'started': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'options': {
+                key: options[key] for key in (
+                    'notes', 'users', 'requests', 'workers', 'seed'
+                )
+            },
+            'results': results,
+        }, ensure_ascii=False, indent=4)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(report + '\n')
+        else:
+            self.stdout.write(report)
+
+    def report(self, scenario, driver, result):
+        result = {'scenario': scenario, 'driver': driver, **result}
+        self.stderr.write(json.dumps(result, ensure_ascii=False))
+        return result
+
+    def seed(self, options):
+        """Досоздаёт недостающие заметки."""
+        notes = options['notes'] - Note.objects.count()
+        if notes <= 0:
+            return
+        start = time.perf_counter()
+        seed(random.Random(options['seed']), options['users'], notes)
+        self.stderr.write(
+            f'Данные готовы за {time.perf_counter() - start:.1f} с.'
+        )
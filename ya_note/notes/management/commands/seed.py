@@ -0,0 +1,34 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from notes.seeding import seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро заполняет базу синтетическими пользователями и заметками '
+        'с уникальными slug. При одном --seed данные одинаковы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--notes', type=int, default=1_000_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        created = seed(
+            random.Random(options['seed']), options['users'],
+            options['notes']
+        )
+        elapsed = time.perf_counter() - start
+        rows = sum(created.values())
+        counts = ', '.join(
+            f'{name} {count}' for name, count in created.items()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: {counts}. Всего {rows} строк за {elapsed:.1f} с '
+            f'({rows / elapsed:.0f} строк/с).'
+        ))
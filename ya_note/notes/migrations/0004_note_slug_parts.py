@@ -0,0 +1,106 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:18
+
+import re
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+# Номер в конце slug, как в notes.slugs на момент миграции.
+NUMBERED_SLUG = re.compile(r'(.+)-(\d{1,9})')
+# Триггеры поискового индекса из миграции 0002.
+CREATE_TRIGGERS_SQL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_insert
+    AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, author_id, title, text)
+        VALUES (new.id, new.author_id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_delete
+    AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, author_id, title, text
+        ) VALUES ('delete', old.id, old.author_id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_update
+    AFTER UPDATE OF author_id, title, text ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, author_id, title, text
+        ) VALUES ('delete', old.id, old.author_id, old.title, old.text);
+        INSERT INTO notes_note_fts(rowid, author_id, title, text)
+        VALUES (new.id, new.author_id, new.title, new.text);
+    END
+    """,
+)
+
+
+def split_slug(slug):
+    match = NUMBERED_SLUG.fullmatch(slug)
+    if match:
+        return match.group(1), int(match.group(2))
+    return slug, 1
+
+
+def restore_index_triggers(apps, schema_editor):
+    """
+    Возвращает триггеры поискового индекса.
+
+    Добавляя столбцы, SQLite пересоздаёт таблицу заметок, и её
+    триггеры пропадают вместе со старой таблицей.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+def fill_slug_parts(apps, schema_editor):
+    """Разбирает slug уже созданных заметок пачками по id."""
+    Note = apps.get_model('notes', 'Note')
+    last_pk = 0
+    while True:
+        batch = list(
+            Note.objects.filter(pk__gt=last_pk).order_by('pk')
+            .only('pk', 'slug')[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        for note in batch:
+            note.slug_base, note.slug_number = split_slug(note.slug)
+        Note.objects.bulk_update(batch, ('slug_base', 'slug_number'))
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_note_list_indexes'),
+    ]
+
+    operations = [
+        # При откате столбцы удаляются тоже пересозданием таблицы.
+        migrations.RunPython(
+            migrations.RunPython.noop, restore_index_triggers
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='slug_base',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='slug_number',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.RunPython(
+            restore_index_triggers, migrations.RunPython.noop
+        ),
+        migrations.RunPython(fill_slug_parts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['slug_base', 'slug_number'], name='note_slug_base_idx'),
+        ),
+    ]
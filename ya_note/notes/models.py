@@ -1,7 +1,19 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
-from pytils.translit import slugify
+from .slugs import allocate_slug, split_slug
+
+SLUG_ATTEMPTS = 5
+
+
+class NoteQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Заполняет основу и номер slug, как это делает save()."""
+        objs = list(objs)
+        for note in objs:
+            note.fill_slug_parts()
+        return super().bulk_create(objs, *args, **kwargs)
 
 
 class Note(models.Model):
@@ -27,12 +39,52 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    # slug, разобранный на основу и номер: по ним allocate_slug
+    # находит наибольший занятый номер одним спуском по индексу.
+    slug_base = models.CharField(max_length=100, default='', editable=False)
+    slug_number = models.PositiveIntegerField(default=1, editable=False)
+
+    objects = NoteQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('id',)
+        # Список автора по id обслуживает индекс внешнего ключа: в SQLite
+        # каждый индекс заканчивается rowid, так что это (author_id, id).
+        indexes = (
+            models.Index(
+                fields=('author', 'title', 'id'), name='note_author_title_idx'
+            ),
+            models.Index(
+                fields=('slug_base', 'slug_number'), name='note_slug_base_idx'
+            ),
+        )
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Сохраняет заметку, при пустом slug подбирая свободный.
+
+        Подобранный slug могут занять одновременно с нами — тогда
+        база отклонит запись, и slug подбирается заново.
+        """
+        if self.slug:
+            self.fill_slug_parts()
+            return super().save(*args, **kwargs)
+        max_slug_length = self._meta.get_field('slug').max_length
+        for attempt in range(1, SLUG_ATTEMPTS + 1):
+            self.slug = allocate_slug(
+                Note.objects.exclude(pk=self.pk), self.title, max_slug_length
+            )
+            self.fill_slug_parts()
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == SLUG_ATTEMPTS:
+                    self.slug = ''
+                    raise
+
+    def fill_slug_parts(self):
+        self.slug_base, self.slug_number = split_slug(self.slug)
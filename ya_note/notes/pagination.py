@@ -0,0 +1,97 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+def encode_cursor(values):
+    """
+    Упаковывает значения ключа сортировки в непрозрачную строку.
+
+    Даты и время сохраняются полностью, с микросекундами: иначе
+    сравнение с курсором зациклилось бы на одной странице.
+    """
+    values = [
+        value.isoformat() if hasattr(value, 'isoformat') else value
+        for value in values
+    ]
+    raw = json.dumps(values, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields):
+    """
+    Распаковывает курсор в значения полей модели fields.
+
+    Каждое значение приводится to_python своего поля, чтобы в запрос
+    не попали строки вместо чисел или словари; испорченный курсор
+    превращается в 404.
+    """
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise Http404('Некорректный курсор.')
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise Http404('Некорректный курсор.')
+    try:
+        values = [
+            field.to_python(value) for field, value in zip(fields, values)
+        ]
+    except (ValidationError, TypeError):
+        raise Http404('Некорректный курсор.')
+    if any(value is None for value in values):
+        raise Http404('Некорректный курсор.')
+    return values
+
+
+def after(ordering, values):
+    """
+    Условие «строго после» для ключа сортировки.
+
+    Для ключа (a, b) строится a >= x AND (a > x OR b > y): первая часть
+    задаёт диапазон по индексу, вторая отсекает уже показанные строки.
+    """
+    field, *rest = ordering
+    value, *rest_values = values
+    name = field.lstrip('-')
+    op = 'lt' if field.startswith('-') else 'gt'
+    strict = Q(**{f'{name}__{op}': value})
+    if not rest:
+        return strict
+    return Q(**{f'{name}__{op}e': value}) & (strict | after(rest, rest_values))
+
+
+def keyset_page(queryset, ordering, cursor, size):
+    """
+    Возвращает страницу объектов после курсора и курсор следующей страницы.
+
+    Стоимость страницы не зависит от её номера: вместо OFFSET
+    используется условие по индексированному ключу сортировки.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        fields = [
+            queryset.model._meta.get_field(field.lstrip('-'))
+            for field in ordering
+        ]
+        queryset = queryset.filter(
+            after(ordering, decode_cursor(cursor, fields))
+        )
+    items = list(queryset[:size + 1])
+    if len(items) <= size:
+        return items, None
+    items = items[:size]
+    return items, encode_cursor(
+        [get_value(items[-1], field.lstrip('-')) for field in ordering]
+    )
+
+
+def get_value(item, field):
+    """Значение поля у объекта модели или у словаря из values()."""
+    if isinstance(item, dict):
+        return item[field]
+    return getattr(item, field)
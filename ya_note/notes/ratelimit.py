@@ -0,0 +1,115 @@
+"""
+Ограничение частоты запросов по пользователю и IP.
+
+Скользящее окно приближается двумя соседними фиксированными: запросы
+прошлого окна учитываются с весом, убывающим к концу текущего.
+Счётчики живут в кэше, поэтому проверка не ходит в базу; в бою кэш
+должен быть общим для процессов, иначе каждый считает сам по себе.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+
+UNSAFE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+def identities(request):
+    """Кого считать: IP всегда, пользователя — если он вошёл."""
+    idents = [f'ip:{request.META.get("REMOTE_ADDR", "")}']
+    if request.user.is_authenticated:
+        idents.append(f'user:{request.user.pk}')
+    return idents
+
+
+def retry_after(count, previous, offset, limit, period):
+    """Через сколько секунд оценка числа запросов опустится до limit."""
+    if count > limit:
+        # Текущее окно станет прошлым, и его вес должен упасть.
+        wait = period - offset + period * (1 - limit / count)
+    else:
+        wait = period * (1 - (limit - count) / previous) - offset
+    return max(math.ceil(wait), 1)
+
+
+def hit(scope, request):
+    """
+    Считает запрос в ограничении scope.
+
+    Возвращает None, если запрос укладывается в ограничение,
+    иначе — через сколько секунд можно повторить.
+    """
+    limit, period = settings.RATE_LIMITS[scope]
+    window, offset = divmod(time.time(), period)
+    weight = 1 - offset / period
+    keys = [
+        (f'ratelimit:{scope}:{ident}:{window:.0f}',
+         f'ratelimit:{scope}:{ident}:{window - 1:.0f}')
+        for ident in identities(request)
+    ]
+    previous_counts = cache.get_many([previous for _, previous in keys])
+    wait = None
+    for key, previous_key in keys:
+        cache.add(key, 0, period * 2)
+        count = cache.incr(key)
+        previous = previous_counts.get(previous_key, 0)
+        if previous * weight + count > limit:
+            wait = max(
+                wait or 0, retry_after(count, previous, offset, limit, period)
+            )
+    return wait
+
+
+def too_many_requests(wait):
+    response = HttpResponse(
+        'Слишком много запросов, повторите позже.',
+        content_type='text/plain; charset=utf-8', status=429
+    )
+    response['Retry-After'] = str(wait)
+    return response
+
+
+class RateLimitMixin:
+    """
+    Ограничивает частоту запросов к view.
+
+    Ограничение берётся из RATE_LIMITS по имени rate_limit_scope
+    и действует на методы rate_limit_methods; без записи
+    в RATE_LIMITS проверки нет.
+    """
+    rate_limit_scope = None
+    rate_limit_methods = ('POST',)
+
+    def dispatch(self, request, *args, **kwargs):
+        if (
+            request.method in self.rate_limit_methods
+            and self.rate_limit_scope in settings.RATE_LIMITS
+        ):
+            wait = hit(self.rate_limit_scope, request)
+            if wait:
+                return too_many_requests(wait)
+        return super().dispatch(request, *args, **kwargs)
+
+
+class RateLimitMiddleware:
+    """
+    Общее ограничение writes на все изменяющие запросы.
+
+    Стоит после AuthenticationMiddleware. Без writes в RATE_LIMITS
+    удаляет себя из цепочки.
+    """
+
+    def __init__(self, get_response):
+        if 'writes' not in settings.RATE_LIMITS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method in UNSAFE_METHODS:
+            wait = hit('writes', request)
+            if wait:
+                return too_many_requests(wait)
+        return self.get_response(request)
@@ -0,0 +1,166 @@
+import re
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+# Автор хранится в индексе отдельной колонкой-токеном: поиск сразу
+# ограничивается заметками автора внутри FTS, без фильтрации по таблице.
+CREATE_INDEX_SQL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS notes_note_fts USING fts5(
+        author_id, title, text,
+        content='notes_note', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_insert
+    AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, author_id, title, text)
+        VALUES (new.id, new.author_id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_delete
+    AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, author_id, title, text
+        ) VALUES ('delete', old.id, old.author_id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_update
+    AFTER UPDATE OF author_id, title, text ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, author_id, title, text
+        ) VALUES ('delete', old.id, old.author_id, old.title, old.text);
+        INSERT INTO notes_note_fts(rowid, author_id, title, text)
+        VALUES (new.id, new.author_id, new.title, new.text);
+    END
+    """,
+    # Заголовок весит больше текста, колонка автора в ранжировании
+    # не участвует.
+    """
+    INSERT INTO notes_note_fts(notes_note_fts, rank)
+    VALUES ('rank', 'bm25(0.0, 10.0, 1.0)')
+    """,
+)
+DROP_INDEX_SQL = (
+    'DROP TRIGGER IF EXISTS notes_note_fts_insert',
+    'DROP TRIGGER IF EXISTS notes_note_fts_delete',
+    'DROP TRIGGER IF EXISTS notes_note_fts_update',
+    'DROP TABLE IF EXISTS notes_note_fts',
+)
+INDEX_FROM_SQL = """
+    INSERT INTO notes_note_fts(rowid, author_id, title, text)
+    SELECT id, author_id, title, text FROM notes_note WHERE id >= %s
+"""
+REBUILD_INDEX_SQL = (
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')"
+)
+
+SEARCH_SQL = """
+    SELECT rowid,
+        highlight(notes_note_fts, 1, char(2), char(3)),
+        snippet(notes_note_fts, 2, char(2), char(3), '…', 16),
+        (SELECT slug FROM notes_note WHERE id = notes_note_fts.rowid)
+    FROM notes_note_fts
+    WHERE notes_note_fts MATCH %s
+    ORDER BY rank
+    LIMIT %s OFFSET %s
+"""
+COUNT_SQL = 'SELECT count(*) FROM notes_note_fts WHERE notes_note_fts MATCH %s'
+
+SearchHit = namedtuple('SearchHit', ('id', 'title', 'snippet', 'slug'))
+
+
+@contextmanager
+def deferred_indexing(first_id):
+    """
+    Индексирует заметки с id от first_id одним запросом после вставки.
+
+    Для массовой вставки это в разы быстрее, чем триггер на каждую
+    строку; на время вставки триггер снимается.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'notes_note_fts'"
+        )
+        if cursor.fetchone() is None:
+            yield
+            return
+        cursor.execute(DROP_INDEX_SQL[0])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(CREATE_INDEX_SQL[1])
+            cursor.execute(INDEX_FROM_SQL, (first_id,))
+
+
+def rebuild_index():
+    """Пересоздаёт индекс, триггеры и заново индексирует все заметки."""
+    with connection.cursor() as cursor:
+        for sql in DROP_INDEX_SQL + CREATE_INDEX_SQL:
+            cursor.execute(sql)
+        cursor.execute(REBUILD_INDEX_SQL)
+
+
+def build_match(author_id, query):
+    """
+    Превращает пользовательский запрос в выражение MATCH.
+
+    Каждое слово берётся в кавычки, так что синтаксис FTS5 в запросе
+    не работает и не может сломать поиск.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    terms = ' '.join(f'"{word}"' for word in words)
+    return f'author_id:"{author_id}" AND ({terms})'
+
+
+def highlight(text):
+    """Экранирует текст и превращает маркеры FTS5 в теги <mark>."""
+    return mark_safe(
+        escape(text).replace('\x02', '<mark>').replace('\x03', '</mark>')
+    )
+
+
+class NoteSearch:
+    """
+    Результаты поиска по заметкам автора, отсортированные по релевантности.
+
+    Поддерживает count() и срезы, поэтому подходит для Paginator.
+    """
+
+    def __init__(self, author_id, query):
+        self.match = build_match(author_id, query)
+
+    def count(self):
+        if self.match is None:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(COUNT_SQL, (self.match,))
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('Поддерживаются только срезы.')
+        if self.match is None:
+            return []
+        start = index.start or 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                SEARCH_SQL, (self.match, index.stop - start, start)
+            )
+            return [
+                SearchHit(pk, highlight(title), highlight(snippet), slug)
+                for pk, title, snippet, slug in cursor.fetchall()
+            ]
@@ -0,0 +1,70 @@
+import re
+from functools import lru_cache
+
+from django.db.models import Q
+from pytils.translit import slugify
+
+# Номер в конце slug: title-12. Длинные числа номером не считаются,
+# чтобы не выйти за целое базы.
+NUMBERED_SLUG = re.compile(r'(.+)-(\d{1,9})')
+MAX_SLUG_NUMBER = 10 ** 9 - 1
+
+
+@lru_cache(maxsize=4096)
+def slugify_title(title):
+    """Транслитерация заголовка; одинаковые заголовки считаются один раз."""
+    return slugify(title)
+
+
+def split_slug(slug):
+    """Основа slug и его номер: title-3 — (title, 3), title — (title, 1)."""
+    match = NUMBERED_SLUG.fullmatch(slug)
+    if match:
+        return match.group(1), int(match.group(2))
+    return slug, 1
+
+
+def last_taken(queryset, base):
+    """
+    Старший занятый slug серии base, base-2, base-3…: (основа, номер).
+
+    Один спуск по индексу (slug_base, slug_number). Если base сам
+    кончается номером, он хранится под более короткой основой, и его
+    строка ищется тем же запросом.
+    """
+    slug_base, number = split_slug(base)
+    query = Q(slug_base=base)
+    if slug_base != base:
+        query |= Q(slug_base=slug_base, slug_number=number)
+    # Короткая основа — префикс base, при обратном порядке она последняя.
+    return queryset.filter(query).order_by(
+        '-slug_base', '-slug_number'
+    ).values_list('slug_base', 'slug_number').first()
+
+
+def allocate_slug(queryset, title, max_length):
+    """
+    Подбирает свободный slug вида title, title-2, title-3 и т. д.
+
+    Номер берётся следующим за старшим занятым, так что свободный
+    slug находится одним запросом, сколько бы одноимённых заметок
+    ни было. Номер длиннее MAX_SLUG_NUMBER уже не разбирается как
+    номер: такой slug становится основой новой серии. Свободный slug
+    может занять другой пользователь, так что сохранять заметку нужно
+    с повтором при конфликте.
+    """
+    base = slugify_title(title)[:max_length]
+    while True:
+        taken = last_taken(queryset, base)
+        if taken is None:
+            return base
+        slug_base, number = taken
+        if slug_base != base:
+            number = 1
+        if number >= MAX_SLUG_NUMBER:
+            base = f'{base}-{number + 1}'[:max_length]
+            continue
+        suffix = f'-{number + 1}'
+        if len(base) + len(suffix) <= max_length:
+            return base + suffix
+        base = base[:max_length - len(suffix)]
@@ -0,0 +1,34 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class TestBenchmark(TestCase):
+
+    def test_benchmark_writes_json_report(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / 'benchmark.json'
+            call_command(
+                'benchmark', notes=10, users=2, requests=3, workers=0,
+                output=output, stderr=io.StringIO()
+            )
+            results = json.loads(output.read_text())['results']
+        pages = [
+            (result['sort'], result['position'], result['driver'])
+            for result in results if result['scenario'] == 'note-list-page'
+        ]
+        self.assertEqual(
+            [result['scenario'] for result in results
+             if result['scenario'] != 'note-list-page'],
+            ['note-list', 'note-search', 'note-create', 'note-edit',
+             'rate-limit-check']
+        )
+        self.assertEqual(len(pages), 16)
+        self.assertIn(('title', 0.5, 'offset'), pages)
+        self.assertTrue(
+            all(result.get('errors', 0) == 0 for result in results)
+        )
@@ -1,5 +1,11 @@
+import csv
+import io
+import json
+from http import HTTPStatus
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 
 from notes.models import Note
@@ -40,6 +46,31 @@ class TestContent(TestCase):
                 object_list = response.context['object_list']
                 self.assertEqual(self.note in object_list, access)
 
+    @override_settings(NOTES_COUNT_ON_PAGE=2)
+    def test_list_pages_follow_each_sort(self):
+        for title in ('Б', 'А', 'В', 'А'):
+            Note.objects.create(title=title, text='text', author=self.author)
+        for sort, key in (('id', 'id'), ('title', 'title')):
+            with self.subTest(sort=sort):
+                seen, params = [], f'sort={sort}'
+                while params is not None:
+                    response = self.client_author.get(
+                        f'{reverse("notes:list")}?{params}'
+                    )
+                    seen += response.context['object_list']
+                    params = response.context.get('next_page')
+                expected = Note.objects.filter(
+                    author=self.author
+                ).order_by(key, 'id')
+                self.assertEqual(seen, list(expected))
+                self.assertNotIn('text', seen[0].__dict__)
+
+    def test_list_broken_cursor_returns_not_found(self):
+        response = self.client_author.get(
+            reverse('notes:list'), {'sort': 'title', 'after': 'WzFd'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
     def test_pages_contains_form(self):
         pages = (
             ('notes:add', None),
@@ -54,3 +85,51 @@ class TestContent(TestCase):
                 self.assertIsInstance(
                     response.context['form'], NoteForm
                 )
+
+    def test_search_finds_only_own_notes(self):
+        Note.objects.create(
+            title='Покупки', text='Купить молоко и хлеб', author=self.author
+        )
+        Note.objects.create(
+            title='Чужие покупки', text='Молоко', author=self.another_author
+        )
+        response = self.client_author.get(
+            reverse('notes:search'), {'q': 'молоко'}
+        )
+        hits = list(response.context['object_list'])
+        self.assertEqual([hit.title for hit in hits], ['Покупки'])
+        self.assertIn('<mark>молоко</mark>', hits[0].snippet)
+
+    def test_search_index_follows_edits(self):
+        self.note.text = 'Совсем <b>новый</b> текст'
+        self.note.save()
+        response = self.client_author.get(
+            reverse('notes:search'), {'q': 'новый"'}
+        )
+        hits = list(response.context['object_list'])
+        self.assertEqual([hit.id for hit in hits], [self.note.id])
+        self.assertIn('&lt;b&gt;<mark>новый</mark>', hits[0].snippet)
+
+    def test_export_contains_only_own_notes(self):
+        Note.objects.create(
+            title='Вторая', text='Строка 1\nСтрока 2', author=self.author
+        )
+        Note.objects.create(
+            title='Чужая', text='text', author=self.another_author
+        )
+        with mock.patch('notes.export.CHUNK_SIZE', 1):
+            response = self.client_author.get(
+                reverse('notes:export'), {'format': 'jsonl'}
+            )
+            lines = b''.join(response.streaming_content).decode()
+        notes = [json.loads(line) for line in lines.splitlines()]
+        self.assertEqual(
+            [note['title'] for note in notes], ['title', 'Вторая']
+        )
+        response = self.client_author.get(
+            reverse('notes:export'), {'format': 'csv'}
+        )
+        rows = list(csv.DictReader(io.StringIO(
+            b''.join(response.streaming_content).decode()
+        )))
+        self.assertEqual(rows[1]['text'], 'Строка 1\nСтрока 2')
@@ -1,12 +1,17 @@
 from http import HTTPStatus
+from unittest import mock
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from pytils.translit import slugify
 
 from notes.models import Note
 from notes.forms import WARNING
+from notes.slugs import allocate_slug
 
 User = get_user_model()
 
@@ -72,6 +77,106 @@ class TestLogic(TestCase):
         expected_slug = slugify(self.form['title'])
         self.assertEqual(new_note.slug, expected_slug)
 
+    def test_same_titles_get_numbered_slugs(self):
+        base = slugify(self.form['title'])
+        Note.objects.create(
+            title='Другой', text='text', slug=f'{base}-other',
+            author=self.author
+        )
+        notes = [
+            Note.objects.create(
+                title=self.form['title'], text='text', author=self.author
+            )
+            for _ in range(3)
+        ]
+        self.assertEqual(
+            [note.slug for note in notes],
+            [base, f'{base}-2', f'{base}-3']
+        )
+
+    def test_numbering_continues_from_highest_suffix(self):
+        base = slugify(self.form['title'])
+        for slug in (base, f'{base}-9', f'{base}-10', f'{base}-2-copy'):
+            Note.objects.create(
+                title='Другой', text='text', slug=slug, author=self.author
+            )
+        note = Note.objects.create(
+            title=self.form['title'], text='text', author=self.author
+        )
+        self.assertEqual(note.slug, f'{base}-11')
+
+    def test_highest_suffix_is_found_by_index(self):
+        base = slugify(self.form['title'])
+        Note.objects.bulk_create(
+            Note(title='Другой', text='text', slug=slug, author=self.author)
+            for slug in (base, f'{base}-3', f'{base}-12')
+        )
+        with CaptureQueriesContext(connection) as queries:
+            slug = allocate_slug(Note.objects.all(), self.form['title'], 100)
+        self.assertEqual(slug, f'{base}-13')
+        self.assertEqual(len(queries), 1)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'EXPLAIN QUERY PLAN ' + queries.captured_queries[-1]['sql']
+            )
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('note_slug_base_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_title_ending_in_number_keeps_its_number(self):
+        base = slugify('План 2024')
+        self.assertEqual(
+            allocate_slug(Note.objects.all(), 'План 2024', 100), base
+        )
+        Note.objects.create(
+            title='Другой', text='text', slug=base, author=self.author
+        )
+        self.assertEqual(
+            allocate_slug(Note.objects.all(), 'План 2024', 100),
+            f'{base}-2'
+        )
+
+    def test_too_long_suffix_starts_new_series(self):
+        base = slugify(self.form['title'])
+        Note.objects.create(
+            title='Другой', text='text', slug=f'{base}-999999999',
+            author=self.author
+        )
+        slugs = [
+            Note.objects.create(
+                title=self.form['title'], text='text', author=self.author
+            ).slug
+            for _ in range(3)
+        ]
+        self.assertEqual(slugs, [
+            f'{base}-1000000000', f'{base}-1000000000-2',
+            f'{base}-1000000000-3',
+        ])
+
+    def test_slug_conflict_is_retried(self):
+        taken = Note.objects.create(
+            title='title', text='text', slug='taken', author=self.author
+        )
+        with mock.patch(
+            'notes.models.allocate_slug', side_effect=(taken.slug, 'free')
+        ):
+            note = Note.objects.create(
+                title='title', text='text', author=self.author
+            )
+        self.assertEqual(note.slug, 'free')
+
+    @override_settings(RATE_LIMITS={'note': (1, 60)})
+    def test_note_rate_limit(self):
+        cache.clear()
+        self.client.force_login(self.author)
+        self.client.post(self.add_url, data=self.form)
+        response = self.client.post(
+            self.add_url, data={**self.form, 'slug': 'other-slug'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertTrue(int(response['Retry-After']) > 0)
+        self.assertEqual(Note.objects.count(), 1)
+
 
 class TestEditAndDeleteNote(TestCase):
 
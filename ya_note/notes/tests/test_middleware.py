@@ -0,0 +1,30 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+
+class TestServerTiming(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', password='password'
+        )
+
+    @override_settings(
+        SERVER_TIMING_ENABLED=True, SERVER_TIMING_SAMPLE_RATE=1
+    )
+    def test_server_timing_header_and_log(self):
+        self.client.force_login(self.author)
+        with self.assertLogs('yanote.middleware', 'INFO') as logs:
+            response = self.client.get(reverse('notes:list'))
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['path'], reverse('notes:list'))
+        self.assertIn(
+            f'queries;desc="{record["queries"]}"',
+            response['Server-Timing']
+        )
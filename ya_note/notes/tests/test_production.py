@@ -0,0 +1,31 @@
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from django.db.utils import ConnectionHandler
+from django.test import TestCase
+
+from yanote import settings_prod
+
+
+class TestProductionDatabase(TestCase):
+
+    def test_backend_applies_pragmas_and_immediate_transactions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'db.sqlite3'
+            connection = ConnectionHandler({'default': {
+                **settings_prod.DATABASES['default'], 'NAME': path,
+            }})['default']
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                self.assertEqual(cursor.fetchone(), ('wal',))
+                cursor.execute('PRAGMA synchronous')
+                self.assertEqual(cursor.fetchone(), (1,))
+            # Транзакция сразу держит блокировку записи.
+            connection._start_transaction_under_autocommit()
+            other = sqlite3.connect(path, timeout=0)
+            with self.assertRaises(sqlite3.OperationalError):
+                other.execute('BEGIN IMMEDIATE')
+            other.close()
+            connection.connection.rollback()
+            connection.close()
@@ -0,0 +1,177 @@
+import json
+import os
+import random
+import re
+from http import HTTPStatus
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes import seeding, urls
+from notes.models import Note
+from yanote import settings_prod
+
+User = get_user_model()
+
+BASELINE_PATH = Path(__file__).with_name('query_baseline.json')
+# Маленький набор — меньше одной страницы. Большой строит seed:
+# заметки других пользователей и тысячи заметок самого автора.
+SMALL_NOTES = 3
+LARGE_DATASET = {'users': 50, 'notes': 50_000}
+LARGE_AUTHOR_NOTES = 5000
+QUERY_PARAMS = {'notes:search': {'q': 'молоко'}}
+# Строка плана SQLite о просмотре таблицы без индекса.
+FULL_SCAN = re.compile(r'SCAN \w+')
+
+
+class TestQueries(TestCase):
+    """
+    Число запросов каждого маршрута не растёт и не зависит от числа строк.
+
+    Исключение — выгрузка: она читает заметки пачками по
+    export.CHUNK_SIZE, и её рост записан в базовом файле. На большом
+    наборе запросы к тому же не просматривают таблицы целиком.
+    Базовые значения хранятся в query_baseline.json; после намеренного
+    изменения их обновляет запуск с UPDATE_QUERY_BASELINE=1.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.client_author = Client()
+        cls.client_author.force_login(cls.author)
+
+    def seed_small(self):
+        Note.objects.all().delete()
+        Note.objects.bulk_create([
+            Note(
+                title=f'Заметка {index}',
+                text='Купить молоко и хлеб.',
+                slug=f'note-{index}',
+                author=self.author,
+            )
+            for index in range(SMALL_NOTES)
+        ])
+        return Note.objects.first()
+
+    def seed_large(self):
+        Note.objects.all().delete()
+        rng = random.Random(0)
+        seeding.seed(rng, **LARGE_DATASET)
+        seeding.seed_notes(rng, LARGE_AUTHOR_NOTES, [self.author.pk])
+        return Note.objects.filter(author=self.author).first()
+
+    def plan_problems(self, queries):
+        """
+        Просмотры таблиц целиком и сортировки без индекса в планах.
+
+        Сортировка найденного по рангу FTS без временного B-дерева
+        невозможна, поэтому для запросов с MATCH она допустима.
+        """
+        problems = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}')
+                for *_, detail in cursor.fetchall():
+                    if FULL_SCAN.fullmatch(detail) or (
+                        'TEMP B-TREE' in detail
+                        and 'MATCH' not in query['sql']
+                    ):
+                        problems.append(f'{detail}: {query["sql"]}')
+        return problems
+
+    def capture_queries(self, name, note):
+        args = ()
+        pattern = next(
+            pattern for pattern in urls.urlpatterns
+            if f'{urls.app_name}:{pattern.name}' == name
+        )
+        if 'slug' in pattern.pattern.converters:
+            args = (note.slug,)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_author.get(
+                reverse(name, args=args), QUERY_PARAMS.get(name, {})
+            )
+            self.assertLess(response.status_code, 400, name)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return queries.captured_queries
+
+    def measure(self):
+        names = [
+            f'{urls.app_name}:{pattern.name}' for pattern in urls.urlpatterns
+        ]
+        counts = {name: {} for name in names}
+        problems = []
+        for dataset, seed in (
+            ('small', self.seed_small), ('large', self.seed_large)
+        ):
+            note = seed()
+            for name in names:
+                queries = self.capture_queries(name, note)
+                counts[name][dataset] = len(queries)
+                if dataset == 'large':
+                    problems += [
+                        f'{name}: {problem}'
+                        for problem in self.plan_problems(queries)
+                    ]
+        return counts, problems
+
+    def test_query_counts_do_not_grow(self):
+        counts, problems = self.measure()
+        self.assertEqual(problems, [], 'запрос просматривает таблицу')
+        if os.environ.get('UPDATE_QUERY_BASELINE'):
+            BASELINE_PATH.write_text(
+                json.dumps(counts, indent=4, sort_keys=True) + '\n'
+            )
+        baseline = json.loads(BASELINE_PATH.read_text())
+        for name, route_counts in counts.items():
+            with self.subTest(name=name):
+                self.assertIn(name, baseline)
+                for dataset, count in route_counts.items():
+                    self.assertLessEqual(count, baseline[name][dataset])
+                self.assertLessEqual(
+                    route_counts['large'] - route_counts['small'],
+                    baseline[name]['large'] - baseline[name]['small'],
+                    'число запросов растёт с числом строк'
+                )
+
+
+@override_settings(
+    SESSION_ENGINE=settings_prod.SESSION_ENGINE,
+    AUTHENTICATION_BACKENDS=settings_prod.AUTHENTICATION_BACKENDS,
+)
+class TestCachedAuth(TestCase):
+    """Сессия и пользователь из кэша: список заметок — один запрос."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', password='password'
+        )
+        cls.url = reverse('notes:list')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.author)
+
+    def test_list_reads_only_notes(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(len(queries), 1, [q['sql'] for q in queries])
+
+    def test_password_change_ends_cached_session(self):
+        self.client.get(self.url)
+        self.author.set_password('new-password')
+        self.author.save()
+        response = self.client.get(self.url)
+        self.assertRedirects(
+            response, f'{reverse("users:login")}?next={self.url}'
+        )
@@ -56,7 +56,10 @@ class TestRoutes(TestCase):
                     self.assertEqual(response.status_code, status)
 
     def test_pages_availability_for_auth_user(self):
-        pages = ('notes:list', 'notes:add', 'notes:success')
+        pages = (
+            'notes:list', 'notes:add', 'notes:success', 'notes:search',
+            'notes:export',
+        )
         for page in pages:
             with self.subTest():
                 self.client.force_login(self.not_author)
@@ -71,6 +74,8 @@ class TestRoutes(TestCase):
             ('notes:add', None),
             ('notes:success', None),
             ('notes:list', None),
+            ('notes:search', None),
+            ('notes:export', None),
         )
         login_url = reverse('users:login')
         for page, args in pages:
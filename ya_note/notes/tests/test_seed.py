@@ -0,0 +1,33 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from notes.models import Note
+from notes.search import NoteSearch
+
+User = get_user_model()
+
+
+class TestSeed(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', password='password'
+        )
+
+    def test_seeded_slugs_continue_numbering(self):
+        call_command('seed', users=2, notes=300, stdout=io.StringIO())
+        slugs = list(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(len(slugs), len(set(slugs)))
+        seeded = Note.objects.filter(author__username__startswith='seed-')
+        self.assertEqual(seeded.count(), 300)
+        first = seeded.first()
+        note = Note.objects.create(
+            title=first.title, text='text', author=self.author
+        )
+        self.assertRegex(note.slug, r'-\d+$')
+        hits = NoteSearch(first.author_id, first.title)
+        self.assertIn(first.pk, [hit.id for hit in hits[0:hits.count()]])
@@ -1,9 +1,22 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError, transaction
+from django.http import Http404, StreamingHttpResponse
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from .export import FORMATS, iter_notes
+from .forms import WARNING, NoteForm
 from .models import Note
+from .pagination import keyset_page
+from .ratelimit import RateLimitMixin
+from .search import NoteSearch
+
+# Порядки списка заметок для ?sort=; у каждого есть свой индекс.
+NOTES_ORDERINGS = {
+    'id': ('id',),
+    'title': ('title', 'id'),
+}
 
 
 class Home(generic.TemplateView):
@@ -26,19 +39,32 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
+class NoteSaveMixin:
+    """Занятый slug превращается в ошибку формы, а не сервера."""
+
+    def form_valid(self, form):
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            form.add_error('slug', form.instance.slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(
+        RateLimitMixin, NoteBase, NoteSaveMixin, generic.CreateView
+):
     """Добавление заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
+    rate_limit_scope = 'note'
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, NoteSaveMixin, generic.UpdateView):
     """Редактирование заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
@@ -50,9 +76,62 @@ class NoteDelete(NoteBase, generic.DeleteView):
 
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """Список заметок пользователя по страницам."""
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        """Страница после курсора ?after, только показываемые поля."""
+        self.sort = self.request.GET.get('sort')
+        if self.sort not in NOTES_ORDERINGS:
+            self.sort = 'id'
+        notes, self.next_cursor = keyset_page(
+            super().get_queryset().only('id', 'slug', 'title'),
+            NOTES_ORDERINGS[self.sort],
+            self.request.GET.get('after'),
+            settings.NOTES_COUNT_ON_PAGE,
+        )
+        return notes
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['sort'] = self.sort
+        if self.next_cursor:
+            params = self.request.GET.copy()
+            params['after'] = self.next_cursor
+            context['next_page'] = params.urlencode()
+        return context
+
+
+class NoteSearchList(NoteBase, generic.ListView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+    paginate_by = 20
+
+    def get_queryset(self):
+        return NoteSearch(self.request.user.pk, self.request.GET.get('q', ''))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class NoteExport(LoginRequiredMixin, generic.View):
+    """Выгрузка всех заметок пользователя в JSON Lines или CSV."""
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('format', 'jsonl')
+        if export_format not in FORMATS:
+            raise Http404('Неизвестный формат выгрузки.')
+        render, content_type = FORMATS[export_format]
+        response = StreamingHttpResponse(
+            render(iter_notes(request.user.pk)), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes.{export_format}"'
+        )
+        return response
+
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
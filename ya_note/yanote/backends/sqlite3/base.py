@@ -0,0 +1,38 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite с настройками для боя.
+
+    В OPTIONS принимает два ключа сверх стандартных: pragmas — словарь
+    PRAGMA, которые выполняются на каждом новом соединении, и
+    transaction_mode — режим BEGIN для transaction.atomic(). С IMMEDIATE
+    транзакция сразу берёт блокировку записи и ждёт её по busy_timeout;
+    с обычным BEGIN транзакция, которая сначала читала, а потом пишет,
+    при занятой базе сразу падает с «database is locked».
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = options.get('pragmas', {})
+        self.transaction_mode = options.get('transaction_mode')
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
+        else:
+            super()._start_transaction_under_autocommit()
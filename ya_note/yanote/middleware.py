@@ -0,0 +1,148 @@
+import hashlib
+import json
+import logging
+import random
+import re
+from collections import defaultdict
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+VALUE_LISTS = re.compile(r'\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)')
+SPACES = re.compile(r'\s+')
+REPEATED_QUERIES_IN_LOG = 5
+
+
+def fingerprint(sql):
+    """
+    Нормализованный SQL: литералы заменены на ?, списки значений свёрнуты.
+
+    Запросы, отличающиеся только параметрами, например N+1 по разным id,
+    получают один отпечаток и группируются в логе.
+    """
+    sql = LITERALS.sub('?', sql)
+    sql = VALUE_LISTS.sub('(...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """Обёртка execute: считает запросы и время, группирует по отпечатку."""
+
+    def __init__(self, keep_all):
+        self.keep_all = keep_all
+        self.slow_seconds = settings.SERVER_TIMING_SLOW_QUERY_MS / 1000
+        self.count = 0
+        self.duration = 0.0
+        self.groups = defaultdict(lambda: {'count': 0, 'ms': 0.0})
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            is_slow = elapsed >= self.slow_seconds
+            if self.keep_all or is_slow:
+                self.add(fingerprint(sql), elapsed, is_slow)
+
+    def add(self, normalized, elapsed, is_slow):
+        group = self.groups[normalized]
+        group['count'] += 1
+        group['ms'] += elapsed * 1000
+        if is_slow:
+            self.slow.append({
+                'fingerprint': hashlib.md5(normalized.encode()).hexdigest(),
+                'sql': normalized,
+                'ms': round(elapsed * 1000, 3),
+            })
+
+    def repeated(self):
+        groups = sorted(
+            self.groups.items(), key=lambda item: -item[1]['count']
+        )
+        return [
+            {
+                'fingerprint': hashlib.md5(sql.encode()).hexdigest(),
+                'sql': sql,
+                'count': group['count'],
+                'ms': round(group['ms'], 3),
+            }
+            for sql, group in groups[:REPEATED_QUERIES_IN_LOG]
+            if group['count'] > 1
+        ]
+
+
+class ServerTimingMiddleware:
+    """
+    Время запроса в заголовке Server-Timing и в JSON-логе.
+
+    Включается настройкой SERVER_TIMING_ENABLED; выключенная, middleware
+    удаляет себя из цепочки и ничего не стоит. В заголовке: db — время
+    SQL и число запросов, tpl — рендер шаблона, view — всё, кроме
+    рендера, total — весь запрос. В лог попадает доля запросов
+    SERVER_TIMING_SAMPLE_RATE и все запросы с медленным SQL.
+
+    Время рендера копится в request.template_time. Код, который
+    рендерит ответ сам, ещё внутри view, прибавляет туда своё время,
+    иначе оно попадёт в view.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = random.random() < settings.SERVER_TIMING_SAMPLE_RATE
+        recorder = QueryRecorder(keep_all=sampled)
+        request.template_time = 0.0
+        start = perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = perf_counter() - start
+        template = request.template_time
+        timings = {
+            'db': recorder.duration, 'tpl': template,
+            'view': total - template, 'total': total,
+        }
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={seconds * 1000:.2f}' for name, seconds in
+            timings.items()
+        ) + f', queries;desc="{recorder.count}"'
+        if sampled or recorder.slow:
+            self.log(request, response, recorder, timings)
+        return response
+
+    def process_template_response(self, request, response):
+        start = perf_counter()
+
+        def rendered(response):
+            request.template_time += perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def log(self, request, response, recorder, timings):
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': recorder.count,
+            **{
+                f'{name}_ms': round(seconds * 1000, 3)
+                for name, seconds in timings.items()
+            },
+            'repeated': recorder.repeated(),
+            'slow': recorder.slow,
+        }, ensure_ascii=False))
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,11 +23,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanote.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'notes.ratelimit.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -55,7 +58,7 @@ WSGI_APPLICATION = 'yanote.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('YANOTE_DATABASE', BASE_DIR / 'db.sqlite3'),
     }
 }
 
@@ -87,3 +90,37 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_PAGE = 50
+
+# Ограничения частоты: имя → (запросов, за секунд) на пользователя
+# и на IP. writes — на все изменяющие запросы, note — на создание
+# заметок.
+RATE_LIMITS = {
+    'writes': (120, 60),
+    'note': (30, 60),
+}
+
+# Сколько секунд пользователь запроса живёт в кэше
+# (см. AUTHENTICATION_BACKENDS в settings_prod).
+USER_CACHE_TIMEOUT = 60 * 60
+
+# Заголовок Server-Timing и JSON-лог времени запросов.
+SERVER_TIMING_ENABLED = False
+# Доля запросов, попадающих в лог; запросы с медленным SQL пишутся всегда.
+SERVER_TIMING_SAMPLE_RATE = 0.01
+SERVER_TIMING_SLOW_QUERY_MS = 100
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yanote.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
@@ -0,0 +1,54 @@
+"""Боевые настройки: DEBUG выключен, SQLite настроен на конкурентный доступ."""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+DEBUG = False
+
+# Счётчики ограничения частоты, сессии и пользователи запросов должны
+# быть общими для всех процессов.
+# Файловый кэш общий для процессов одной машины; на нескольких машинах
+# его заменяет memcached.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'YANOTE_CACHE_DIR', '/var/tmp/yanote-cache'
+        ),
+    }
+}
+
+# Сессия и пользователь запроса читаются из кэша, в базу — только
+# при промахе. Обычный ModelBackend оставлен для сессий, открытых
+# до его замены.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+AUTHENTICATION_BACKENDS = [
+    'notes.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+DATABASES = {
+    'default': {
+        **DATABASES['default'],
+        'ENGINE': 'yanote.backends.sqlite3',
+        # Соединение живёт между запросами, а не открывается на каждый.
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                # Читатели не ждут писателей и наоборот.
+                'journal_mode': 'WAL',
+                # В режиме WAL fsync только при контрольной точке.
+                'synchronous': 'NORMAL',
+                # Ждать освободившейся блокировки до 5 с, а не падать.
+                'busy_timeout': 5000,
+                # 64 МБ страничного кэша и 256 МБ отображения в память
+                # на соединение.
+                'cache_size': -64 * 1024,
+                'mmap_size': 256 * 1024 * 1024,
+                'temp_store': 'MEMORY',
+            },
+        },
+    }
+}